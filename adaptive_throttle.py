@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Adaptive AIMD throttle
+Raises request rate and concurrency additively while responses are healthy
+and cuts them multiplicatively on block pages, 429/403 responses and timeouts
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Optional
+
+from config_manager import Config
+from rate_limiter import get_host_limiter
+
+logger = logging.getLogger(__name__)
+
+# Outcomes that mean the site wants us to slow down
+BACKOFF_OUTCOMES = ("block", "throttled", "timeout")
+
+
+class AIMDSettings:
+    """Controller tuning"""
+    RATE_STEP = 0.05             # req/s added per healthy window
+    CONCURRENCY_STEP = 1         # workers added per healthy window
+    DECREASE_FACTOR = 0.5        # multiplier applied on a backoff signal
+    HEALTHY_WINDOW = 10          # consecutive fast successes before increasing
+    LATENCY_TARGET = 8.0         # seconds; slower responses do not count as healthy
+    BACKOFF_COOLDOWN = 10.0      # seconds; one decrease per burst of block signals
+
+
+class AIMDController:
+    """Additive-increase / multiplicative-decrease controller for rate and concurrency"""
+
+    def __init__(self, rate: Optional[float] = None, min_rate: Optional[float] = None,
+                 max_rate: Optional[float] = None, max_concurrency: Optional[int] = None,
+                 limiter=None):
+        self.min_rate = min_rate or Config.ADAPTIVE_MIN_RATE
+        self.max_rate = max_rate or Config.ADAPTIVE_MAX_RATE
+        self.rate = min(max(rate or Config.HOST_RATE_PER_SEC, self.min_rate), self.max_rate)
+        self.max_concurrency = max(1, max_concurrency or Config.DETAIL_WORKERS)
+        self.concurrency = 1
+        self.limiter = limiter or get_host_limiter()
+        self.limiter.set_rate(self.rate)
+
+        self._cond = threading.Condition()
+        self._in_flight = 0
+        self._healthy_streak = 0
+        self._last_backoff = 0.0
+        self._latency_ewma: Optional[float] = None
+        self.counts = {"ok": 0, "slow": 0, "block": 0, "throttled": 0, "timeout": 0, "error": 0}
+        self.increases = 0
+        self.decreases = 0
+
+    def record(self, outcome: str, latency: Optional[float] = None):
+        """
+        Feed one request outcome into the controller
+        outcome: 'ok' | 'block' | 'throttled' (429/403) | 'timeout' | 'error'
+        """
+        with self._cond:
+            if latency is not None:
+                self._latency_ewma = latency if self._latency_ewma is None else 0.8 * self._latency_ewma + 0.2 * latency
+
+            if outcome == "ok" and latency is not None and latency > AIMDSettings.LATENCY_TARGET:
+                outcome = "slow"
+            self.counts[outcome] = self.counts.get(outcome, 0) + 1
+
+            if outcome in BACKOFF_OUTCOMES:
+                self._healthy_streak = 0
+                self._decrease(outcome)
+            elif outcome == "ok":
+                self._healthy_streak += 1
+                if self._healthy_streak >= AIMDSettings.HEALTHY_WINDOW:
+                    self._healthy_streak = 0
+                    self._increase()
+            else:
+                # Slow responses and generic errors hold the current level
+                self._healthy_streak = 0
+
+    def _increase(self):
+        new_rate = min(self.max_rate, self.rate + AIMDSettings.RATE_STEP)
+        new_concurrency = min(self.max_concurrency, self.concurrency + AIMDSettings.CONCURRENCY_STEP)
+        if new_rate == self.rate and new_concurrency == self.concurrency:
+            return
+        self.rate, self.concurrency = new_rate, new_concurrency
+        self.increases += 1
+        self.limiter.set_rate(self.rate)
+        self._cond.notify_all()
+        logger.debug(f"Throttle increased: rate={self.rate:.2f}/s concurrency={self.concurrency}")
+
+    def _decrease(self, outcome: str):
+        now = time.monotonic()
+        if now - self._last_backoff < AIMDSettings.BACKOFF_COOLDOWN:
+            return
+        self._last_backoff = now
+        self.rate = max(self.min_rate, self.rate * AIMDSettings.DECREASE_FACTOR)
+        self.concurrency = max(1, int(self.concurrency * AIMDSettings.DECREASE_FACTOR))
+        self.decreases += 1
+        self.limiter.set_rate(self.rate)
+        logger.warning(f"Throttle backing off ({outcome}): rate={self.rate:.2f}/s concurrency={self.concurrency}")
+
+    @property
+    def delay(self) -> float:
+        """Seconds between requests at the current rate"""
+        return 1.0 / self.rate
+
+    @contextmanager
+    def slot(self):
+        """Hold one of the currently allowed concurrent request slots"""
+        with self._cond:
+            while self._in_flight >= self.concurrency:
+                self._cond.wait()
+            self._in_flight += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._in_flight -= 1
+                self._cond.notify()
+
+    def get_state(self) -> Dict:
+        """Current limits and signal counters"""
+        with self._cond:
+            return {
+                "rate": round(self.rate, 3),
+                "delay_seconds": round(self.delay, 2),
+                "concurrency": self.concurrency,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self._in_flight,
+                "latency_ewma": round(self._latency_ewma, 3) if self._latency_ewma is not None else None,
+                "increases": self.increases,
+                "decreases": self.decreases,
+                "signals": dict(self.counts),
+            }
+
+
+def classify_fetch(result: Dict) -> str:
+    """Map a DetailFetcher result onto a controller outcome"""
+    reason = result.get("fallback_reason")
+    if reason in ("http_429", "http_403"):
+        return "throttled"
+    if result.get("via") == "failed":
+        if reason == "timeout":
+            return "timeout"
+        return "block" if reason == "challenge" else "error"
+    # A challenge on plain HTTP that Chrome got past is bot detection, not rate pressure
+    return "ok"
+
+
+_controller: Optional[AIMDController] = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> AIMDController:
+    """Process-wide controller shared by every fetcher and scraper"""
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            _controller = AIMDController()
+        return _controller
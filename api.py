@@ -4,7 +4,7 @@ Production-ready Mobile.de Scraper API
 Secure, optimized FastAPI with streaming support
 """
 
-from fastapi import FastAPI, HTTPException, Depends, Query
+from fastapi import FastAPI, HTTPException, Depends, Query, Response
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
@@ -13,12 +13,21 @@ import asyncio
 import logging
 import os
 import json
-from datetime import datetime
+from datetime import date, datetime
+
+from sqlalchemy import select
 
 from config_manager import Config
 from database import db_manager, Car
-from db_operations import get_database_stats
+from db_operations import get_database_stats_async
 from scraper_unified import MobileDeScraperUnified
+from driver_pool import get_driver_pool
+from adaptive_throttle import get_controller
+from pipeline import get_pipeline_stats
+from pagination import SORT_PATTERN, InvalidCursor, keyset_page, split_page
+from search_index import search_cars as run_search
+from car_query import DEFAULT_FACETS, InvalidQuery, get_filter_usage, query_cars
+from db_writer import close_db_writer, get_db_writer_stats
 
 # Setup logging
 logging.basicConfig(
@@ -46,6 +55,32 @@ security = HTTPBearer()
 scraper_running = False
 
 
+@app.on_event("startup")
+async def warm_driver_pool():
+    """Start pooled Chrome drivers in the background so /populate does not wait on startup"""
+    if Config.DRIVER_POOL_ENABLED:
+        asyncio.get_running_loop().run_in_executor(None, get_driver_pool().warm)
+
+
+@app.on_event("shutdown")
+async def close_driver_pool():
+    """Quit pooled Chrome drivers"""
+    if Config.DRIVER_POOL_ENABLED:
+        get_driver_pool().close_all()
+
+
+@app.on_event("shutdown")
+async def drain_db_writer():
+    """Write the cars still queued in the background DB writer"""
+    await asyncio.get_running_loop().run_in_executor(None, close_db_writer)
+
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Close the async engine's pooled connections"""
+    await db_manager.dispose_async()
+
+
 class StatusResponse(BaseModel):
     status: str
     scraper_running: bool
@@ -53,6 +88,28 @@ class StatusResponse(BaseModel):
     timestamp: str
 
 
+class CarQueryItem(BaseModel):
+    id: int
+    url_title: Optional[str]
+    price: Optional[str]
+    location: Optional[str]
+    mileage: Optional[str]
+    price_eur: Optional[int]
+    mileage_km: Optional[int]
+    power_kw: Optional[int]
+    first_registration_date: Optional[date]
+    fuel_type: Optional[str]
+    transmission: Optional[str]
+    category: Optional[str]
+
+
+class CarQueryResponse(BaseModel):
+    total: int
+    cars: List[CarQueryItem]
+    facets: dict
+    next_cursor: Optional[str]
+
+
 class CarResponse(BaseModel):
     id: int
     url_title: Optional[str]
@@ -70,7 +127,7 @@ def verify_token(credentials: HTTPAuthorizationCredentials = Depends(security)):
 @app.get("/", response_model=StatusResponse)
 async def root():
     """Health check with system status"""
-    db_connected = db_manager.health_check()
+    db_connected = await db_manager.async_health_check()
     return StatusResponse(
         status="running",
         scraper_running=scraper_running,
@@ -138,7 +195,22 @@ async def get_status():
     """Get scraper status"""
     return {
         "scraper_running": scraper_running,
-        "database_connected": db_manager.health_check(),
+        "database_connected": await db_manager.async_health_check(),
+        "driver_pool": get_driver_pool().get_stats() if Config.DRIVER_POOL_ENABLED else None,
+        "pipelines": get_pipeline_stats(),
+        "db_writer": get_db_writer_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+
+@app.get("/throttle")
+async def get_throttle():
+    """Get adaptive throttle state (rate, concurrency, block signals)"""
+    if not Config.ADAPTIVE_THROTTLE_ENABLED:
+        raise HTTPException(status_code=404, detail="Adaptive throttle disabled")
+    return {
+        **get_controller().get_state(),
+        "hosts": get_controller().limiter.get_stats(),
         "timestamp": datetime.utcnow().isoformat()
     }
 
@@ -146,19 +218,34 @@ async def get_status():
 @app.get("/stats")
 async def get_stats():
     """Get database statistics"""
-    return get_database_stats()
+    return {**await get_database_stats_async(), "query_filter_usage": get_filter_usage()}
 
 
 @app.get("/cars", response_model=List[CarResponse])
 async def list_cars(
+    response: Response,
     skip: int = Query(0, ge=0),
     limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor of the previous page"),
+    sort: str = Query("id", pattern=SORT_PATTERN, description="id or created_at; prefix - for descending"),
     token: str = Depends(verify_token)
 ):
-    """List cars with pagination"""
+    """
+    List cars in a stable order. Pass the X-Next-Cursor response header back
+    as cursor for the next page (keyset pagination); the header is absent on
+    the last page. skip (offset paging) is still accepted but slows down
+    with depth.
+    """
+    if cursor and skip:
+        raise HTTPException(status_code=400, detail="Use either cursor or skip, not both")
     try:
-        with db_manager.get_session() as session:
-            cars = session.query(Car).offset(skip).limit(limit).all()
+        query = keyset_page(select(Car), sort, limit, cursor)
+        if skip:
+            query = query.offset(skip)
+        async with db_manager.get_async_session() as session:
+            cars, next_cursor = split_page((await session.scalars(query)).all(), sort, limit)
+            if next_cursor:
+                response.headers["X-Next-Cursor"] = next_cursor
             if not cars:
                 raise HTTPException(
                     status_code=404, 
@@ -173,6 +260,8 @@ async def list_cars(
                     mileage=car.mileage
                 ) for car in cars
             ]
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except HTTPException:
         raise
     except Exception as e:
@@ -180,12 +269,65 @@ async def list_cars(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@app.get("/cars/query", response_model=CarQueryResponse)
+async def query_cars_endpoint(
+    response: Response,
+    fuel_type: Optional[List[str]] = Query(None),
+    transmission: Optional[List[str]] = Query(None),
+    category: Optional[List[str]] = Query(None),
+    seller_type: Optional[List[str]] = Query(None),
+    vehicle_condition: Optional[List[str]] = Query(None),
+    drive_type: Optional[List[str]] = Query(None),
+    price_min: Optional[int] = Query(None, ge=0),
+    price_max: Optional[int] = Query(None, ge=0),
+    mileage_min: Optional[int] = Query(None, ge=0),
+    mileage_max: Optional[int] = Query(None, ge=0),
+    power_kw_min: Optional[int] = Query(None, ge=0),
+    power_kw_max: Optional[int] = Query(None, ge=0),
+    registered_from: Optional[date] = Query(None),
+    registered_to: Optional[date] = Query(None),
+    facet: Optional[List[str]] = Query(None, description="facet fields to count (default fuel_type, transmission, category)"),
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None),
+    sort: str = Query("id", pattern=SORT_PATTERN),
+    token: str = Depends(verify_token)
+):
+    """
+    Filter cars by field values (repeat a parameter for any-of) and numeric
+    ranges; returns one page of cars, the total match count and facet counts
+    """
+    values = {
+        "fuel_type": fuel_type, "transmission": transmission, "category": category,
+        "seller_type": seller_type, "vehicle_condition": vehicle_condition, "drive_type": drive_type,
+    }
+    ranges = {
+        "price": (price_min, price_max),
+        "mileage": (mileage_min, mileage_max),
+        "power_kw": (power_kw_min, power_kw_max),
+        "registration": (registered_from, registered_to),
+    }
+    try:
+        async with db_manager.get_async_session() as session:
+            result = await query_cars(session, values, ranges, facets=facet or DEFAULT_FACETS,
+                                      sort=sort, limit=limit, cursor=cursor)
+            result["cars"] = [{field: getattr(car, field) for field in CarQueryItem.model_fields}
+                              for car in result["cars"]]
+        if result["next_cursor"]:
+            response.headers["X-Next-Cursor"] = result["next_cursor"]
+        return result
+    except (InvalidQuery, InvalidCursor) as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error querying cars: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @app.get("/cars/{car_id}")
 async def get_car(car_id: int, token: str = Depends(verify_token)):
     """Get single car by ID"""
     try:
-        with db_manager.get_session() as session:
-            car = session.query(Car).filter(Car.id == car_id).first()
+        async with db_manager.get_async_session() as session:
+            car = await session.get(Car, car_id)
             if not car:
                 raise HTTPException(status_code=404, detail="Car not found")
             
@@ -203,13 +345,14 @@ async def search_cars(
     limit: int = Query(10, ge=1, le=50),
     token: str = Depends(verify_token)
 ):
-    """Search cars by title"""
+    """
+    Full-text search over title, model range, trim line, dealer and features.
+    Every term matches as a prefix; results are ranked by relevance.
+    """
     try:
-        with db_manager.get_session() as session:
-            cars = session.query(Car).filter(
-                Car.url_title.ilike(f"%{q}%")
-            ).limit(limit).all()
-            if not cars:
+        async with db_manager.get_async_session() as session:
+            results = await run_search(session, q, limit, trigram_enabled=db_manager.trigram_enabled)
+            if not results:
                 raise HTTPException(
                     status_code=404, 
                     detail=f"No cars found matching '{q}'. Try different search terms."
@@ -219,8 +362,9 @@ async def search_cars(
                     "id": car.id,
                     "url_title": car.url_title,
                     "price": car.price,
-                    "location": car.location
-                } for car in cars
+                    "location": car.location,
+                    "rank": round(rank, 4)
+                } for car, rank in results
             ]
     except HTTPException:
         raise
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+API concurrency benchmark
+Fires a fixed number of requests at a running API from many concurrent
+clients, cycling through a mix of endpoints, and reports per-endpoint
+latency percentiles. /health is in the default mix: if database handlers
+block the event loop, its p99 climbs with the database load.
+
+Needs httpx: pip install -r requirements-dev.txt
+
+Usage:
+  python bench_api.py [--url http://localhost:8000] [--concurrency 50] [--requests 2000]
+                      [--endpoint /cars?limit=50 --endpoint /health ...]
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from collections import defaultdict
+
+import httpx
+
+from config_manager import Config
+
+DEFAULT_ENDPOINTS = ["/health", "/", "/stats", "/cars?limit=50", "/cars/1", "/search?q=golf&limit=50"]
+
+
+def percentile(values, pct: float) -> float:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+async def run(url: str, token: str, endpoints, concurrency: int, total: int):
+    latencies = defaultdict(list)
+    errors = defaultdict(int)
+    counter = iter(range(total))
+    headers = {"Authorization": f"Bearer {token}"}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=url, headers=headers, limits=limits, timeout=60) as client:
+        async def client_loop():
+            for i in counter:
+                endpoint = endpoints[i % len(endpoints)]
+                start = time.perf_counter()
+                try:
+                    response = await client.get(endpoint)
+                    if response.status_code >= 500:
+                        errors[endpoint] += 1
+                except httpx.HTTPError:
+                    errors[endpoint] += 1
+                latencies[endpoint].append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return latencies, errors, elapsed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="p50/p95/p99 API latency under parallel load")
+    parser.add_argument("--url", default=f"http://localhost:{Config.API_PORT}", help="API base URL")
+    parser.add_argument("--token", default=Config.API_TOKEN, help="bearer token (default: API_TOKEN)")
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent clients")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests")
+    parser.add_argument("--endpoint", action="append", dest="endpoints",
+                        help="endpoint to include (repeatable; default: a mix of read endpoints)")
+    args = parser.parse_args(argv)
+    endpoints = args.endpoints or DEFAULT_ENDPOINTS
+
+    latencies, errors, elapsed = asyncio.run(run(args.url, args.token, endpoints, args.concurrency, args.requests))
+
+    print(f"{args.requests} requests, {args.concurrency} concurrent, {elapsed:.2f}s "
+          f"({args.requests / elapsed:.0f} req/s)")
+    print(f"{'endpoint':32} {'n':>6} {'err':>5} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    all_latencies = []
+    for endpoint in endpoints:
+        values = latencies.get(endpoint)
+        if not values:
+            continue
+        all_latencies.extend(values)
+        print(f"{endpoint:32} {len(values):6d} {errors[endpoint]:5d} "
+              f"{percentile(values, 50) * 1000:9.1f} {percentile(values, 95) * 1000:9.1f} "
+              f"{percentile(values, 99) * 1000:9.1f} {max(values) * 1000:9.1f}")
+    if all_latencies:
+        print(f"{'all':32} {len(all_latencies):6d} {sum(errors.values()):5d} "
+              f"{percentile(all_latencies, 50) * 1000:9.1f} {percentile(all_latencies, 95) * 1000:9.1f} "
+              f"{percentile(all_latencies, 99) * 1000:9.1f} {max(all_latencies) * 1000:9.1f}")
+    return 1 if sum(errors.values()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Detail page extractor benchmark
+Compares the multi-pass extractors (one soup.find per field, find_next per
+spec row, gallery re-parse) with the single-pass extract_listing_fields on
+recorded pages: checks the output is identical and reports the speedup
+
+Usage:
+  python bench_extractor.py [archive | pages_dir | pages.tar.gz] [--limit N] [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+
+from html_parsing import make_soup
+from reparse import iter_pages
+from scraper import (
+    extract_image_urls,
+    extract_listing_fields,
+    scrape_car_details,
+    scrape_car_details_from_element,
+    scrape_technical_data_from_element,
+)
+
+
+def multi_pass(soup):
+    """The extraction parse_listing_html used to run: three extractors plus a gallery re-parse"""
+    container = soup.find('div', class_='mRJ5K')
+    image_urls = extract_image_urls(container.decode_contents()) if container else []
+    fields = {
+        **scrape_car_details_from_element(soup),
+        **scrape_car_details(soup),
+        **scrape_technical_data_from_element(soup),
+    }
+    return fields, image_urls
+
+
+def _best_of(func, soups, repeat):
+    best = float("inf")
+    results = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = [func(soup) for soup in soups]
+        best = min(best, time.perf_counter() - start)
+    return best, results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark single-pass vs multi-pass listing extraction")
+    parser.add_argument("source", nargs="?", default="archive",
+                        help="directory of .html files, a tarball, an archive directory, or 'archive'")
+    parser.add_argument("--limit", type=int, default=200, help="maximum pages to load")
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs over all pages (best is kept)")
+    args = parser.parse_args(argv)
+
+    pages = []
+    for item in iter_pages(args.source):
+        pages.append(item)
+        if len(pages) >= args.limit:
+            break
+    if not pages:
+        print(f"No pages found in {args.source}")
+        return 1
+
+    # Parse once up front so only extraction is timed
+    soups = [make_soup(html) for _, html in pages]
+    multi_time, multi_results = _best_of(multi_pass, soups, args.repeat)
+    single_time, single_results = _best_of(extract_listing_fields, soups, args.repeat)
+
+    mismatches = []
+    for (url, _), (m_fields, m_images), (s_fields, s_images) in zip(pages, multi_results, single_results):
+        if m_fields != s_fields or sorted(m_images) != sorted(s_images):
+            mismatches.append(url)
+
+    n = len(pages)
+    print(f"{n} pages")
+    print(f"multi-pass : {multi_time / n * 1000:8.2f} ms/page")
+    print(f"single-pass: {single_time / n * 1000:8.2f} ms/page")
+    print(f"speedup    : {multi_time / single_time:8.2f}x")
+    print(f"mismatches : {len(mismatches)}")
+    for url in mismatches[:10]:
+        print(f"    {url}")
+    return 1 if mismatches else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
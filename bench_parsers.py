@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Parser backend benchmark
+Builds the soup of recorded pages with every installed HTML_PARSER backend
+and runs the DOM extractor over it, reporting parse time and peak memory per
+page, plus any page whose extracted record differs from the html.parser
+reference. parse_listing_html is not used: it can skip the DOM entirely when
+the embedded JSON is complete, which would leave no backend to measure.
+
+Usage:
+  python bench_parsers.py [archive | pages_dir | pages.tar.gz] [--limit N] [--repeat N]
+"""
+
+import argparse
+import statistics
+import sys
+import time
+import tracemalloc
+
+from config_manager import Config
+from html_parsing import FALLBACK_BACKEND, available_backends, make_soup
+from reparse import iter_pages
+from scraper import extract_listing_fields
+
+
+def parse_page(html):
+    """Soup with the configured backend plus the DOM extractor; image URL order comes from a set"""
+    fields, image_urls = extract_listing_fields(make_soup(html))
+    return {**fields, "img_urls": sorted(image_urls)}
+
+
+def bench_backend(backend, pages, repeat):
+    """Median seconds and peak traced KB per page for one backend, plus its records"""
+    Config.HTML_PARSER = backend
+    timings = []
+    records = []
+    for _, html in pages:
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            record = parse_page(html)
+            runs.append(time.perf_counter() - start)
+        timings.append(min(runs))
+        records.append(record)
+
+    peaks = []
+    for _, html in pages:
+        tracemalloc.start()
+        parse_page(html)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+
+    return {
+        "ms_per_page": statistics.median(timings) * 1000,
+        "pages_per_sec": len(pages) / sum(timings),
+        "peak_kb_per_page": statistics.median(peaks),
+    }, records
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark HTML parser backends on recorded pages")
+    parser.add_argument("source", nargs="?", default="archive",
+                        help="directory of .html files, a tarball, an archive directory, or 'archive'")
+    parser.add_argument("--limit", type=int, default=200, help="maximum pages to load")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per page (best is kept)")
+    args = parser.parse_args(argv)
+
+    pages = []
+    for item in iter_pages(args.source):
+        pages.append(item)
+        if len(pages) >= args.limit:
+            break
+    if not pages:
+        print(f"No pages found in {args.source}")
+        return 1
+
+    backends = available_backends()
+    print(f"{len(pages)} pages, backends: {', '.join(backends)}")
+    print(f"{'backend':<12} {'ms/page':>9} {'pages/s':>9} {'peak KB/page':>13} {'mismatches':>11}")
+
+    reference = None
+    if FALLBACK_BACKEND in backends:
+        backends.remove(FALLBACK_BACKEND)
+        backends.insert(0, FALLBACK_BACKEND)
+    for backend in backends:
+        result, records = bench_backend(backend, pages, args.repeat)
+        if reference is None:
+            reference = records
+        mismatches = [pages[i][0] for i, (a, b) in enumerate(zip(reference, records)) if a != b]
+        print(f"{backend:<12} {result['ms_per_page']:>9.2f} {result['pages_per_sec']:>9.1f} "
+              f"{result['peak_kb_per_page']:>13.0f} {len(mismatches):>11}")
+        for url in mismatches[:5]:
+            print(f"    differs from {FALLBACK_BACKEND}: {url}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Faceted car queries for /cars/query
+Value filters (any of several values per field) and range filters on the
+typed numeric columns select a page of cars (keyset-paginated, see
+pagination.py). Facet counts for the same filters come from one UNION ALL
+statement: one GROUP BY branch per facet plus a total. Each facet ignores
+its own filter, so a dashboard filtered to Diesel still shows how many
+Petrol cars match the other filters.
+"""
+
+import logging
+import threading
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import CompoundSelect, String, func, literal, select, union_all
+
+from database import Car
+from pagination import keyset_page, split_page
+
+logger = logging.getLogger(__name__)
+
+# Low-cardinality columns that can be filtered by value and counted as facets
+FACET_FIELDS = {
+    "fuel_type": Car.fuel_type,
+    "transmission": Car.transmission,
+    "category": Car.category,
+    "seller_type": Car.seller_type,
+    "vehicle_condition": Car.vehicle_condition,
+    "drive_type": Car.drive_type,
+}
+DEFAULT_FACETS = ("fuel_type", "transmission", "category")
+
+# Range filter name -> typed column (see normalize.py)
+RANGE_FIELDS = {
+    "price": Car.price_eur,
+    "mileage": Car.mileage_km,
+    "power_kw": Car.power_kw,
+    "registration": Car.first_registration_date,
+}
+
+# Filter combinations seen by this process, to check the composite indexes on Car against real use
+_filter_usage = Counter()
+_usage_lock = threading.Lock()
+
+
+class InvalidQuery(ValueError):
+    pass
+
+
+def build_conditions(values: Dict[str, List[str]], ranges: Dict[str, Tuple]) -> Dict[str, List]:
+    """WHERE conditions grouped by the field they filter"""
+    conditions: Dict[str, List] = {}
+    for name, selected in values.items():
+        if name not in FACET_FIELDS:
+            raise InvalidQuery(f"Unknown filter field: {name}")
+        if selected:
+            conditions.setdefault(name, []).append(FACET_FIELDS[name].in_(selected))
+    for name, (low, high) in ranges.items():
+        if name not in RANGE_FIELDS:
+            raise InvalidQuery(f"Unknown range field: {name}")
+        if low is not None and high is not None and low > high:
+            raise InvalidQuery(f"{name}: minimum is greater than maximum")
+        column = RANGE_FIELDS[name]
+        if low is not None:
+            conditions.setdefault(name, []).append(column >= low)
+        if high is not None:
+            conditions.setdefault(name, []).append(column <= high)
+    return conditions
+
+
+def facet_statement(conditions: Dict[str, List], facets) -> CompoundSelect:
+    """Total and per-facet value counts as (facet, value, count) rows in one statement"""
+    every = [c for conds in conditions.values() for c in conds]
+    branches = [select(literal("_total").label("facet"), literal(None, String).label("value"),
+                       func.count().label("count")).select_from(Car).where(*every)]
+    for name in facets:
+        column = FACET_FIELDS[name]
+        others = [c for field, conds in conditions.items() if field != name for c in conds]
+        branches.append(select(literal(name), column, func.count())
+                        .where(column.is_not(None), *others).group_by(column))
+    return union_all(*branches)
+
+
+async def query_cars(session, values: Dict[str, List[str]], ranges: Dict[str, Tuple],
+                     facets=DEFAULT_FACETS, sort: str = "id", limit: int = 50,
+                     cursor: Optional[str] = None) -> Dict:
+    """A page of matching cars, the next-page cursor, the total and the facet counts"""
+    unknown = [name for name in facets if name not in FACET_FIELDS]
+    if unknown:
+        raise InvalidQuery(f"Unknown facet: {', '.join(unknown)}")
+    conditions = build_conditions(values, ranges)
+    record_filter_usage(conditions)
+    page_query = keyset_page(select(Car).where(*(c for conds in conditions.values() for c in conds)),
+                             sort, limit, cursor)
+    cars, next_cursor = split_page((await session.scalars(page_query)).all(), sort, limit)
+
+    total = 0
+    facet_counts: Dict[str, Dict[str, int]] = {name: {} for name in facets}
+    for facet, value, count in (await session.execute(facet_statement(conditions, facets))).all():
+        if facet == "_total":
+            total = count
+        else:
+            facet_counts[facet][value] = count
+    facet_counts = {name: dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+                    for name, counts in facet_counts.items()}
+    return {"total": total, "cars": cars, "next_cursor": next_cursor, "facets": facet_counts}
+
+
+def record_filter_usage(conditions: Dict[str, List]):
+    key = ",".join(sorted(conditions)) or "(none)"
+    with _usage_lock:
+        _filter_usage[key] += 1
+
+
+def get_filter_usage() -> Dict[str, int]:
+    """How often each filter combination was queried, most common first"""
+    with _usage_lock:
+        return dict(_filter_usage.most_common())
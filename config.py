@@ -8,13 +8,3 @@ This file is kept for backward compatibility only.
 from config_manager import Config
 
 __all__ = ['Config']
-    def validate(cls) -> bool:
-        """Validate configuration"""
-        required_vars = ['DB_URL', 'API_TOKEN']
-        missing = [var for var in required_vars if not getattr(cls, var)]
-        if missing:
-            raise ValueError(f"Missing required environment variables: {missing}")
-        return True
-
-# Validate configuration on import
-Config.validate()
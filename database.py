@@ -4,8 +4,9 @@ import os
 import json
 import logging
 from datetime import datetime
-from contextlib import contextmanager
-from sqlalchemy import create_engine, Column, Integer, String, Text, DateTime, ForeignKey, pool
+from contextlib import asynccontextmanager, contextmanager
+from sqlalchemy import create_engine, inspect, make_url, text, Column, Index, Integer, String, Text, Date, DateTime, ForeignKey, pool
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 from sqlalchemy.types import TypeDecorator
@@ -15,11 +16,47 @@ from config_manager import Config
 logger = logging.getLogger(__name__)
 Base = declarative_base()
 
+# Full-text search index DDL per backend; the SQLite FTS5 table is kept in sync by triggers
+SEARCH_INDEX_DDL = {
+    'postgresql': [
+        "CREATE INDEX IF NOT EXISTS ix_cars_search_tsv ON cars "
+        "USING gin (to_tsvector('simple', coalesce(search_document, '')))",
+    ],
+    'sqlite': [
+        "CREATE VIRTUAL TABLE IF NOT EXISTS cars_fts USING fts5("
+        "search_document, content='cars', content_rowid='id', tokenize='unicode61 remove_diacritics 2')",
+        "CREATE TRIGGER IF NOT EXISTS cars_fts_ai AFTER INSERT ON cars BEGIN "
+        "INSERT INTO cars_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+        "CREATE TRIGGER IF NOT EXISTS cars_fts_ad AFTER DELETE ON cars BEGIN "
+        "INSERT INTO cars_fts(cars_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); END",
+        "CREATE TRIGGER IF NOT EXISTS cars_fts_au AFTER UPDATE OF search_document ON cars BEGIN "
+        "INSERT INTO cars_fts(cars_fts, rowid, search_document) VALUES ('delete', old.id, old.search_document); "
+        "INSERT INTO cars_fts(rowid, search_document) VALUES (new.id, new.search_document); END",
+    ],
+}
+# Trigram index for fuzzy matching (Postgres with the pg_trgm extension)
+TRIGRAM_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX IF NOT EXISTS ix_cars_search_trgm ON cars USING gin (search_document gin_trgm_ops)",
+]
+
+# asyncio drivers used for the API's async engine, by backend
+ASYNC_DRIVERS = {'postgresql': 'postgresql+asyncpg', 'sqlite': 'sqlite+aiosqlite'}
+
+def async_db_url(url: str):
+    """DB_URL with its driver swapped for the asyncio one, or None if the backend has none"""
+    sa_url = make_url(url)
+    driver = ASYNC_DRIVERS.get(sa_url.get_backend_name())
+    if driver is None:
+        return None
+    return sa_url.set(drivername=driver).render_as_string(hide_password=False)
+
 class JSONType(TypeDecorator):
     impl = Text
+    cache_ok = True
     
     def process_bind_param(self, value, dialect):
-        return json.dumps(value) if value else value
+        return json.dumps(value) if value is not None else None
     
     def process_result_value(self, value, dialect):
         return json.loads(value) if value else value
@@ -62,10 +99,34 @@ class Car(Base):
     co2_class = Column(String(50))
     fuel_consumption = Column(String(100))
     image_urls = Column(JSONType)
+    # Typed values parsed from the text columns above (see normalize.py)
+    price_eur = Column(Integer, index=True)
+    mileage_km = Column(Integer, index=True)
+    power_kw = Column(Integer, index=True)
+    power_hp = Column(Integer)
+    first_registration_date = Column(Date, index=True)
+    cubic_capacity_ccm = Column(Integer)
+    co2_g_km = Column(Integer)
+    # Title, model, trim, dealer and feature names; indexed for full-text search (see search_index.py)
+    search_document = Column(Text)
+    content_hash = Column(String(64))
     created_at = Column(DateTime, default=datetime.utcnow, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    last_seen_at = Column(DateTime, default=datetime.utcnow, index=True)
+    # Last save of a detail page record; search cards only move last_seen_at (see get_fresh_listing_ids)
+    details_fetched_at = Column(DateTime)
     
     car_features = relationship("CarFeature", back_populates="car", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Keyset pagination by creation time (see pagination.py)
+        Index('ix_cars_created_at_id', 'created_at', 'id'),
+        # /cars/query: the filter combinations dashboards use (fuel + transmission + price,
+        # fuel + mileage, category + price); the leading columns also serve the facet GROUP BYs
+        Index('ix_cars_fuel_transmission_price', 'fuel_type', 'transmission', 'price_eur'),
+        Index('ix_cars_fuel_mileage', 'fuel_type', 'mileage_km'),
+        Index('ix_cars_category_price', 'category', 'price_eur'),
+    )
 
 class Feature(Base):
     __tablename__ = 'features'
@@ -93,7 +154,12 @@ class DatabaseManager:
     def __init__(self):
         self.engine = None
         self.SessionLocal = None
+        self.async_engine = None
+        self.AsyncSessionLocal = None
+        self.async_error = None
+        self.trigram_enabled = False
         self._initialize()
+        self._initialize_async()
     
     def _initialize(self):
         """Initialize database connection"""
@@ -109,11 +175,81 @@ class DatabaseManager:
             )
             self.SessionLocal = sessionmaker(bind=self.engine)
             Base.metadata.create_all(self.engine)
+            self._add_missing_columns()
+            self._create_search_index()
             logger.info("Database initialized successfully")
         except Exception as e:
             logger.error(f"Database initialization failed: {e}")
             raise
     
+    def _initialize_async(self):
+        """Create the asyncio engine used by the API; the sync engine keeps serving the scraper"""
+        try:
+            url = Config.DB_ASYNC_URL or async_db_url(Config.DB_URL)
+            if url is None:
+                raise ValueError(f"no asyncio driver for {make_url(Config.DB_URL).get_backend_name()}")
+            self.async_engine = create_async_engine(
+                url,
+                echo=False,
+                pool_size=Config.DB_POOL_SIZE,
+                max_overflow=Config.DB_MAX_OVERFLOW,
+                pool_pre_ping=True,
+                pool_recycle=3600
+            )
+            self.AsyncSessionLocal = async_sessionmaker(bind=self.async_engine, expire_on_commit=False)
+            logger.info(f"Async database engine ready ({self.async_engine.dialect.driver})")
+        except Exception as e:
+            # The scraper and worker only need the sync engine
+            self.async_error = str(e)
+            logger.warning(f"Async database engine unavailable: {e}")
+    
+    def _add_missing_columns(self):
+        """Add model columns and indexes that existing tables predate"""
+        inspector = inspect(self.engine)
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c['name'] for c in inspector.get_columns(table.name)}
+            missing = [c for c in table.columns if c.name not in existing]
+            if missing:
+                with self.engine.begin() as conn:
+                    for column in missing:
+                        col_type = column.type.compile(dialect=self.engine.dialect)
+                        conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}'))
+                        logger.info(f"Added column {table.name}.{column.name}")
+            existing_indexes = {i['name'] for i in inspect(self.engine).get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing_indexes:
+                    index.create(self.engine, checkfirst=True)
+                    logger.info(f"Created index {index.name}")
+    
+    def _create_search_index(self):
+        """Create the full-text (and, on Postgres, trigram) index over cars.search_document"""
+        dialect = self.engine.dialect.name
+        statements = SEARCH_INDEX_DDL.get(dialect)
+        if not statements:
+            logger.warning(f"No full-text index for {dialect}; search falls back to substring matching")
+            return
+        try:
+            new_fts = dialect == 'sqlite' and not inspect(self.engine).has_table('cars_fts')
+            with self.engine.begin() as conn:
+                for statement in statements:
+                    conn.execute(text(statement))
+                if new_fts:
+                    # Index the rows that predate the FTS table
+                    conn.execute(text("INSERT INTO cars_fts(cars_fts) VALUES ('rebuild')"))
+        except Exception as e:
+            logger.error(f"Full-text search index setup failed: {e}")
+            return
+        if dialect == 'postgresql':
+            try:
+                with self.engine.begin() as conn:
+                    for statement in TRIGRAM_DDL:
+                        conn.execute(text(statement))
+                self.trigram_enabled = True
+            except Exception as e:
+                logger.warning(f"Trigram index unavailable, fuzzy search disabled: {e}")
+    
     @contextmanager
     def get_session(self):
         """Get database session with proper cleanup"""
@@ -128,15 +264,46 @@ class DatabaseManager:
         finally:
             session.close()
     
+    @asynccontextmanager
+    async def get_async_session(self):
+        """Get an asyncio database session with proper cleanup"""
+        if self.AsyncSessionLocal is None:
+            raise RuntimeError(f"Async database engine unavailable: {self.async_error}")
+        session = self.AsyncSessionLocal()
+        try:
+            yield session
+            await session.commit()
+        except Exception as e:
+            await session.rollback()
+            logger.error(f"Database session error: {e}")
+            raise
+        finally:
+            await session.close()
+    
     def health_check(self) -> bool:
         """Check database connectivity"""
         try:
             with self.get_session() as session:
-                session.execute("SELECT 1")
+                session.execute(text("SELECT 1"))
             return True
         except Exception as e:
             logger.error(f"Database health check failed: {e}")
             return False
+    
+    async def async_health_check(self) -> bool:
+        """Check database connectivity over the async engine"""
+        try:
+            async with self.get_async_session() as session:
+                await session.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            logger.error(f"Database health check failed: {e}")
+            return False
+    
+    async def dispose_async(self):
+        """Close the async engine's connections"""
+        if self.async_engine is not None:
+            await self.async_engine.dispose()
 
 # Global database manager instance
 db_manager = DatabaseManager()
@@ -1,124 +1,367 @@
 #!/usr/bin/env python3
 
+from config_manager import Config
 from database import db_manager, Car, Feature, FeatureSection, CarFeature
-from datetime import datetime
+from sqlalchemy import event, func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from datetime import datetime, timedelta
 import logging
+import hashlib
+import json
+import threading
+from collections import OrderedDict
 from urllib.parse import urlsplit, parse_qs
+from normalize import NUMERIC_FIELDS, normalize_car_fields
+from search_index import build_search_document
 
 logger = logging.getLogger(__name__)
 
+# Bookkeeping and derived fields that must not influence change detection
+HASH_EXCLUDED_FIELDS = {'content_hash', 'last_seen_at', 'details_fetched_at', 'created_at', 'updated_at',
+                        'search_document', *NUMERIC_FIELDS}
+
+# Dialects with a native INSERT ... ON CONFLICT DO UPDATE; others fall back to per-row upserts
+UPSERT_INSERTS = {'postgresql': postgresql_insert, 'sqlite': sqlite_insert}
+
+# Rows per multi-row INSERT (keeps the bind parameter count under driver limits)
+BULK_UPSERT_CHUNK = 500
+LINK_INSERT_CHUNK = 5000
+
+class NameIdCache:
+    """
+    Process-wide, size-bounded LRU of name -> id for a lookup table with a
+    unique name (Feature, FeatureSection). Ids resolved inside a transaction
+    are kept on the session and only enter the cache once it commits, so a
+    rollback never leaves ids of rows that do not exist.
+    """
+
+    def __init__(self, model, max_size: int):
+        self.model = model
+        self.max_size = max_size
+        self._ids = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _pending(self, session) -> dict:
+        return session.info.setdefault('pending_name_ids', {}).setdefault(self, {})
+
+    def resolve(self, session, names) -> dict:
+        """Ids for the names, inserting unknown ones with one conflict-safe multi-row INSERT"""
+        names = set(names)
+        ids = {}
+        with self._lock:
+            for name in names:
+                if name in self._ids:
+                    self._ids.move_to_end(name)
+                    ids[name] = self._ids[name]
+            self.hits += len(ids)
+            self.misses += len(names) - len(ids)
+        pending = self._pending(session)
+        ids.update({name: pending[name] for name in names - ids.keys() if name in pending})
+        missing = names - ids.keys()
+        if not missing:
+            return ids
+
+        found = self._select(session, missing)
+        unknown = missing - found.keys()
+        if unknown:
+            insert = UPSERT_INSERTS.get(session.get_bind().dialect.name)
+            if insert is not None:
+                session.execute(insert(self.model).values([{'name': name} for name in unknown])
+                                .on_conflict_do_nothing(index_elements=['name']))
+            else:
+                session.add_all([self.model(name=name) for name in unknown])
+                session.flush()
+            found.update(self._select(session, unknown))
+        pending.update(found)
+        ids.update(found)
+        return ids
+
+    def _select(self, session, names) -> dict:
+        rows = session.query(self.model.id, self.model.name).filter(self.model.name.in_(list(names))).all()
+        return {row.name: row.id for row in rows}
+
+    def put_many(self, mapping: dict):
+        with self._lock:
+            self._ids.update(mapping)
+            for name in mapping:
+                self._ids.move_to_end(name)
+            while len(self._ids) > self.max_size:
+                self._ids.popitem(last=False)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'size': len(self._ids), 'max_size': self.max_size, 'hits': self.hits, 'misses': self.misses}
+
+feature_ids = NameIdCache(Feature, Config.FEATURE_ID_CACHE_SIZE)
+section_ids = NameIdCache(FeatureSection, Config.FEATURE_ID_CACHE_SIZE)
+
+@event.listens_for(db_manager.SessionLocal, 'after_commit')
+def _publish_pending_ids(session):
+    for cache, mapping in session.info.pop('pending_name_ids', {}).items():
+        cache.put_many(mapping)
+
+@event.listens_for(db_manager.SessionLocal, 'after_rollback')
+def _discard_pending_ids(session):
+    session.info.pop('pending_name_ids', None)
+
 def save_car_to_database(car_data: dict) -> bool:
     """Save car data to database with improved error handling"""
     try:
         with db_manager.get_session() as session:
-            # Extract features data
-            features_data = car_data.pop('features', {})
-            
-            # Prepare car data
-            car_dict = {
-                'source': 'mobile.de',
-                'listing_id': extract_listing_id_from_url(car_data.get('url', '')),
-                'url': car_data.get('url', ''),
-                'url_title': car_data.get('title', ''),
-                'additional_info': car_data.get('additional_info'),
-                'price': car_data.get('price'),
-                'dealer_rating': car_data.get('dealer_rating'),
-                'dealer': car_data.get('dealer'),
-                'seller_type': car_data.get('seller_type'),
-                'location': car_data.get('location'),
-                'phone': car_data.get('phone'),
-                'rating': car_data.get('rating'),
-                'negotiable': car_data.get('negotiable'),
-                'monthly_rate': car_data.get('monthly_rate'),
-                'monthly_rate_link': car_data.get('monthly_rate_href'),
-                'financing_link': car_data.get('financing_link'),
-                'mileage': car_data.get('mileage'),
-                'power': car_data.get('power'),
-                'fuel_type': car_data.get('fuel_type'),
-                'transmission': car_data.get('transmission'),
-                'first_registration': car_data.get('first_registration'),
-                'vehicle_condition': car_data.get('vehicle_condition'),
-                'category': car_data.get('category'),
-                'model_range': car_data.get('model_range'),
-                'trim_line': car_data.get('trim_line'),
-                'vehicle_number': car_data.get('vehicle_number'),
-                'origin': car_data.get('origin'),
-                'cubic_capacity': car_data.get('cubic_capacity'),
-                'drive_type': car_data.get('drive_type'),
-                'energy_consumption': car_data.get('energy_consumption'),
-                'co2_emissions': car_data.get('co2_emissions'),
-                'co2_class': car_data.get('co2_class'),
-                'fuel_consumption': car_data.get('fuel_consumption'),
-                'image_urls': car_data.get('img_urls', [])
-            }
-            
-            # Upsert car record
-            existing_car = session.query(Car).filter_by(url=car_dict['url']).first()
-            if existing_car:
-                # Update existing record
-                for key, value in car_dict.items():
-                    if key != 'created_at':
-                        setattr(existing_car, key, value)
-                existing_car.updated_at = datetime.utcnow()
-                car = existing_car
-                
-                # Remove existing car_features for this car
-                session.query(CarFeature).filter_by(car_id=car.id).delete()
-            else:
-                # Create new record
-                car = Car(**car_dict)
-                session.add(car)
-                session.flush()  # Get the ID
-            
-            # Handle features if they exist
-            if features_data:
-                _save_car_features(session, car, features_data)
-            
-            logger.info(f"Saved car to database: {car.listing_id}")
+            _upsert_car(session, car_data, datetime.utcnow())
             return True
             
     except Exception as e:
         logger.error(f"Error saving car to database: {e}")
         return False
 
-def _save_car_features(session, car, features_data):
-    """Save car features to database"""
-    if isinstance(features_data, list):
-        features_dict = {'General': features_data}
-    elif isinstance(features_data, dict):
-        features_dict = features_data
+def save_cars_to_database(cars) -> dict:
+    """Save a batch of car records in one transaction; returns counts per outcome"""
+    counts = {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': 0}
+    cars = list(cars)
+    if not cars:
+        return counts
+    insert = UPSERT_INSERTS.get(db_manager.engine.dialect.name)
+    try:
+        with db_manager.get_session() as session:
+            now = datetime.utcnow()
+            if insert is None:
+                for car_data in cars:
+                    counts[_upsert_car(session, car_data, now)] += 1
+            else:
+                for start in range(0, len(cars), BULK_UPSERT_CHUNK):
+                    chunk = cars[start:start + BULK_UPSERT_CHUNK]
+                    for outcome, count in _upsert_cars_bulk(session, insert, chunk, now).items():
+                        counts[outcome] += count
+    except Exception as e:
+        logger.error(f"Error saving car batch to database: {e}")
+        return {'inserted': 0, 'updated': 0, 'unchanged': 0, 'failed': len(cars)}
+    logger.info(f"Saved car batch to database: {counts}")
+    return counts
+
+def _upsert_cars_bulk(session, insert, cars, now: datetime) -> dict:
+    """
+    Upsert a batch with one SELECT of the stored hashes, one UPDATE of
+    last_seen_at for unchanged cars and one multi-row
+    INSERT ... ON CONFLICT (url) DO UPDATE for new and changed cars
+    """
+    records = {}
+    for car_data in cars:
+        car_dict, features_data = _car_record(car_data, now)
+        records[car_dict['url']] = (car_dict, features_data)  # last copy of a repeated URL wins
+
+    stored = dict(session.query(Car.url, Car.content_hash).filter(Car.url.in_(list(records))).all())
+    unchanged = {url for url, (car_dict, _) in records.items()
+                 if url in stored and stored[url] == car_dict['content_hash']}
+    changed = [url for url in records if url not in unchanged]
+    counts = {'inserted': sum(1 for url in changed if url not in stored),
+              'updated': sum(1 for url in changed if url in stored),
+              'unchanged': len(unchanged)}
+
+    for details in (False, True):
+        urls = [url for url in unchanged if (records[url][0]['details_fetched_at'] is not None) == details]
+        if urls:
+            # Only record that we saw them (keep updated_at as is)
+            session.query(Car).filter(Car.url.in_(urls)).update(
+                _seen_values(now, details), synchronize_session=False
+            )
+    if not changed:
+        return counts
+
+    rows = [{**records[url][0], 'created_at': now, 'updated_at': now} for url in changed]
+    stmt = insert(Car).values(rows)
+    set_ = {name: stmt.excluded[name] for name in rows[0] if name not in ('url', 'created_at')}
+    # A search card must not clear the detail fetch time of a stored listing
+    set_['details_fetched_at'] = func.coalesce(stmt.excluded.details_fetched_at, Car.details_fetched_at)
+    stmt = stmt.on_conflict_do_update(index_elements=['url'], set_=set_).returning(Car.id, Car.url)
+    car_ids = {url: car_id for car_id, url in session.execute(stmt)}
+
+    # Replace the feature links of updated cars
+    updated_ids = [car_ids[url] for url in changed if url in stored]
+    if updated_ids:
+        session.query(CarFeature).filter(CarFeature.car_id.in_(updated_ids)).delete(synchronize_session=False)
+    _save_car_features(session, {car_ids[url]: records[url][1] for url in changed if records[url][1]})
+    return counts
+
+def _car_record(car_data: dict, now: datetime):
+    """Car column values and features for a scraped car; returns (car_dict, features_data)"""
+    # Extract features data
+    features_data = car_data.pop('features', {})
+    
+    # Prepare car data
+    car_dict = {
+        'source': 'mobile.de',
+        'listing_id': extract_listing_id_from_url(car_data.get('url', '')),
+        'url': car_data.get('url', ''),
+        'url_title': car_data.get('title', ''),
+        'additional_info': car_data.get('additional_info'),
+        'price': car_data.get('price'),
+        'dealer_rating': car_data.get('dealer_rating'),
+        'dealer': car_data.get('dealer'),
+        'seller_type': car_data.get('seller_type'),
+        'location': car_data.get('location'),
+        'phone': car_data.get('phone'),
+        'rating': car_data.get('rating'),
+        'negotiable': car_data.get('negotiable'),
+        'monthly_rate': car_data.get('monthly_rate'),
+        'monthly_rate_link': car_data.get('monthly_rate_href'),
+        'financing_link': car_data.get('financing_link'),
+        'mileage': car_data.get('mileage'),
+        'power': car_data.get('power'),
+        'fuel_type': car_data.get('fuel_type'),
+        'transmission': car_data.get('transmission'),
+        'first_registration': car_data.get('first_registration'),
+        'vehicle_condition': car_data.get('vehicle_condition'),
+        'category': car_data.get('category'),
+        'model_range': car_data.get('model_range'),
+        'trim_line': car_data.get('trim_line'),
+        'vehicle_number': car_data.get('vehicle_number'),
+        'origin': car_data.get('origin'),
+        'cubic_capacity': car_data.get('cubic_capacity'),
+        'drive_type': car_data.get('drive_type'),
+        'energy_consumption': car_data.get('energy_consumption'),
+        'co2_emissions': car_data.get('co2_emissions'),
+        'co2_class': car_data.get('co2_class'),
+        'fuel_consumption': car_data.get('fuel_consumption'),
+        'image_urls': car_data.get('img_urls', [])
+    }
+    car_dict.update(normalize_car_fields(car_dict))
+    car_dict['search_document'] = build_search_document(car_dict, features_data)
+    
+    car_dict['content_hash'] = compute_content_hash(car_dict, features_data)
+    car_dict['last_seen_at'] = now
+    # Only records parsed from a detail page (scraper.parse_listing_html) count as a detail fetch
+    car_dict['details_fetched_at'] = now if car_data.get('detail_page') else None
+    return car_dict, features_data
+
+def _seen_values(now: datetime, details: bool) -> dict:
+    """Column updates for a stored car seen again without changes"""
+    values = {Car.last_seen_at: now, Car.updated_at: Car.updated_at}
+    if details:
+        values[Car.details_fetched_at] = now
+    return values
+
+def _upsert_car(session, car_data: dict, now: datetime) -> str:
+    """Insert or update one car; returns 'inserted', 'updated' or 'unchanged'"""
+    car_dict, features_data = _car_record(car_data, now)
+    
+    # Upsert car record
+    existing_car = session.query(Car).filter_by(url=car_dict['url']).first()
+    if existing_car and existing_car.content_hash == car_dict['content_hash']:
+        # Unchanged: only record that we saw it (keep updated_at as is)
+        session.query(Car).filter(Car.id == existing_car.id).update(
+            _seen_values(now, car_dict['details_fetched_at'] is not None),
+            synchronize_session=False
+        )
+        logger.info(f"Car unchanged, skipped update: {existing_car.listing_id}")
+        return 'unchanged'
+    if existing_car:
+        # Update existing record
+        for key, value in car_dict.items():
+            if key != 'created_at' and not (key == 'details_fetched_at' and value is None):
+                setattr(existing_car, key, value)
+        existing_car.updated_at = now
+        car = existing_car
+        
+        # Remove existing car_features for this car
+        session.query(CarFeature).filter_by(car_id=car.id).delete()
     else:
-        return
+        # Create new record
+        car = Car(**car_dict)
+        session.add(car)
+        session.flush()  # Get the ID
+    
+    # Handle features if they exist
+    if features_data:
+        _save_car_features(session, {car.id: features_data})
     
-    for section_name, feature_list in features_dict.items():
-        if not feature_list:
+    logger.info(f"Saved car to database: {car.listing_id}")
+    return 'updated' if existing_car else 'inserted'
+
+def compute_content_hash(car_dict: dict, features_data) -> str:
+    """SHA-256 over the normalized car fields and features, independent of ordering"""
+    normalized = {}
+    for key, value in car_dict.items():
+        if key in HASH_EXCLUDED_FIELDS:
             continue
-            
-        # Upsert section
-        section = session.query(FeatureSection).filter_by(name=section_name).first()
-        if not section:
-            section = FeatureSection(name=section_name)
-            session.add(section)
-            session.flush()
-        
-        for feature_name in feature_list:
-            if not feature_name or not feature_name.strip():
-                continue
-                
-            # Upsert feature
-            feature = session.query(Feature).filter_by(name=feature_name).first()
-            if not feature:
-                feature = Feature(name=feature_name)
-                session.add(feature)
-                session.flush()
-            
-            # Create car_feature link
-            car_feature = CarFeature(
-                car_id=car.id,
-                feature_id=feature.id,
-                section_id=section.id
-            )
-            session.add(car_feature)
+        if isinstance(value, str):
+            value = value.strip() or None
+        elif isinstance(value, (list, tuple, set)):
+            value = sorted(v.strip() for v in value if v)
+        normalized[key] = value
+    if isinstance(features_data, dict):
+        normalized['features'] = {k: sorted(v) for k, v in features_data.items() if v}
+    elif isinstance(features_data, list):
+        normalized['features'] = sorted(features_data)
+    payload = json.dumps(normalized, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def backfill_numeric_columns(batch_size: int = 1000, only_missing: bool = True) -> dict:
+    """Fill the typed columns of stored cars from their text columns, one UPDATE batch at a time"""
+    counts = {'scanned': 0, 'updated': 0}
+    source_columns = [Car.id, Car.updated_at, Car.price, Car.mileage, Car.power, Car.first_registration,
+                      Car.cubic_capacity, Car.co2_emissions]
+    last_id = 0
+    try:
+        while True:
+            with db_manager.get_session() as session:
+                query = session.query(*source_columns).filter(Car.id > last_id)
+                if only_missing:
+                    query = query.filter(or_(*(getattr(Car, name).is_(None) for name in NUMERIC_FIELDS)))
+                rows = query.order_by(Car.id).limit(batch_size).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                params = []
+                for row in rows:
+                    values = normalize_car_fields(row._asdict())
+                    if any(v is not None for v in values.values()):
+                        # Derived columns only: keep updated_at as is
+                        params.append({'id': row.id, 'updated_at': row.updated_at, **values})
+                if params:
+                    session.execute(update(Car), params)
+                counts['scanned'] += len(rows)
+                counts['updated'] += len(params)
+            logger.info(f"Backfilled typed columns up to car id {last_id}: {counts}")
+    except Exception as e:
+        logger.error(f"Error backfilling typed columns: {e}")
+        counts['error'] = str(e)
+    return counts
+
+def _save_car_features(session, features_by_car: dict):
+    """Link features to cars ({car_id: features_data}) with cached ids and one multi-row INSERT"""
+    sections_by_car = {}
+    for car_id, features_data in features_by_car.items():
+        if isinstance(features_data, list):
+            features_dict = {'General': features_data}
+        elif isinstance(features_data, dict):
+            features_dict = features_data
+        else:
+            continue
+        sections = {section: [f for f in feature_list if f and f.strip()]
+                    for section, feature_list in features_dict.items() if feature_list}
+        sections_by_car[car_id] = {section: names for section, names in sections.items() if names}
+    
+    all_sections = {section for sections in sections_by_car.values() for section in sections}
+    all_features = {name for sections in sections_by_car.values() for names in sections.values() for name in names}
+    if not all_features:
+        return
+    section_id_map = section_ids.resolve(session, all_sections)
+    feature_id_map = feature_ids.resolve(session, all_features)
+    
+    links = {
+        (car_id, feature_id_map[name], section_id_map[section])
+        for car_id, sections in sections_by_car.items()
+        for section, names in sections.items()
+        for name in names
+    }
+    rows = [{'car_id': car_id, 'feature_id': feature_id, 'section_id': section_id}
+            for car_id, feature_id, section_id in links]
+    for start in range(0, len(rows), LINK_INSERT_CHUNK):
+        session.execute(CarFeature.__table__.insert().values(rows[start:start + LINK_INSERT_CHUNK]))
 
 def extract_listing_id_from_url(url: str) -> str:
     """Extract listing ID from mobile.de URL"""
@@ -130,6 +373,30 @@ def extract_listing_id_from_url(url: str) -> str:
     except Exception:
         return ""
 
+def get_fresh_listing_ids(listing_ids, ttl_hours: float, chunk_size: int = 500) -> set:
+    """
+    Return the listing IDs whose detail page was saved within ttl_hours
+    Sightings in search results do not count: they refresh last_seen_at but
+    carry none of the detail fields
+    """
+    fresh = set()
+    ids = [i for i in dict.fromkeys(listing_ids) if i]
+    if not ids:
+        return fresh
+    cutoff = datetime.utcnow() - timedelta(hours=ttl_hours)
+    try:
+        with db_manager.get_session() as session:
+            for start in range(0, len(ids), chunk_size):
+                chunk = ids[start:start + chunk_size]
+                rows = session.query(Car.listing_id).filter(
+                    Car.listing_id.in_(chunk),
+                    Car.details_fetched_at >= cutoff
+                ).all()
+                fresh.update(row.listing_id for row in rows)
+    except Exception as e:
+        logger.error(f"Error checking listing freshness: {e}")
+    return fresh
+
 def get_database_stats() -> dict:
     """Get database statistics"""
     try:
@@ -142,6 +409,28 @@ def get_database_stats() -> dict:
                 "total_cars": total_cars,
                 "total_features": total_features,
                 "total_sections": total_sections,
+                "feature_id_cache": feature_ids.stats(),
+                "section_id_cache": section_ids.stats(),
+                "database_connected": True
+            }
+    except Exception as e:
+        logger.error(f"Error getting database stats: {e}")
+        return {"database_connected": False, "error": str(e)}
+
+async def get_database_stats_async() -> dict:
+    """get_database_stats over the async engine (for the API)"""
+    try:
+        async with db_manager.get_async_session() as session:
+            total_cars = await session.scalar(select(func.count()).select_from(Car))
+            total_features = await session.scalar(select(func.count()).select_from(Feature))
+            total_sections = await session.scalar(select(func.count()).select_from(FeatureSection))
+            
+            return {
+                "total_cars": total_cars,
+                "total_features": total_features,
+                "total_sections": total_sections,
+                "feature_id_cache": feature_ids.stats(),
+                "section_id_cache": section_ids.stats(),
                 "database_connected": True
             }
     except Exception as e:
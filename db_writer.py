@@ -0,0 +1,176 @@
+#!/usr/bin/env python3
+"""
+Background database writer
+One process-wide thread takes car records from a bounded queue and writes
+them in batched transactions, closing a batch when it reaches
+DB_WRITER_BATCH cars or has waited DB_WRITER_FLUSH_SECONDS. A full queue
+blocks submit(), so a slow database slows the scrape instead of buffering
+without limit. flush() waits until everything submitted before it is
+written; close_db_writer() drains the queue on shutdown.
+"""
+
+import atexit
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _FlushMarker:
+    """Queued behind pending records; set once everything before it is written"""
+
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class DbWriter:
+    """Coalescing writer thread in front of a batch store function"""
+
+    def __init__(self, store_fn: Callable[[List[Dict]], Dict], queue_size: Optional[int] = None,
+                 batch_size: Optional[int] = None, flush_seconds: Optional[float] = None):
+        self.store_fn = store_fn
+        self.batch_size = batch_size or Config.DB_WRITER_BATCH
+        self.flush_seconds = Config.DB_WRITER_FLUSH_SECONDS if flush_seconds is None else flush_seconds
+        self._queue = queue.Queue(queue_size or Config.DB_WRITER_QUEUE_SIZE)
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self.stats = {"submitted": 0, "batches": 0, "cars": 0, "errors": 0, "inserted": 0, "updated": 0,
+                      "unchanged": 0, "busy_seconds": 0.0, "producer_blocked_seconds": 0.0, "max_depth": 0}
+
+    def start(self) -> "DbWriter":
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+        return self
+
+    def submit(self, cars: List[Dict]) -> float:
+        """Queue records for writing; blocks while the queue is full and returns the seconds blocked"""
+        if self._closed:
+            raise RuntimeError("DB writer is closed")
+        start = time.monotonic()
+        for car in cars:
+            # store_fn mutates records (features are popped), so queue copies
+            self._queue.put(dict(car))
+        waited = time.monotonic() - start
+        with self._lock:
+            self.stats["submitted"] += len(cars)
+            self.stats["producer_blocked_seconds"] += waited
+            self.stats["max_depth"] = max(self.stats["max_depth"], self._queue.qsize())
+        return waited
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every record submitted so far is written; False on timeout"""
+        if self._thread is None or not self._thread.is_alive():
+            return self._queue.empty()
+        marker = _FlushMarker()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def _run(self):
+        batch: List[Dict] = []
+        deadline = 0.0
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if batch else None
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                self._write(batch)
+                continue
+            if item is _STOP:
+                self._write(batch)
+                return
+            if isinstance(item, _FlushMarker):
+                self._write(batch)
+                item.done.set()
+                continue
+            if not batch:
+                deadline = time.monotonic() + self.flush_seconds
+            batch.append(item)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+
+    def _write(self, batch: List[Dict]):
+        if not batch:
+            return
+        records = list(batch)
+        batch.clear()
+        start = time.monotonic()
+        try:
+            counts = self.store_fn(records) or {}
+        except Exception as e:
+            logger.error(f"DB writer batch error: {e}")
+            counts = {"failed": len(records)}
+        with self._lock:
+            self.stats["batches"] += 1
+            self.stats["cars"] += len(records)
+            self.stats["errors"] += counts.get("failed", 0)
+            self.stats["busy_seconds"] += time.monotonic() - start
+            for key in ("inserted", "updated", "unchanged"):
+                self.stats[key] += counts.get(key, 0)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            stats = dict(self.stats)
+        stats["busy_seconds"] = round(stats["busy_seconds"], 3)
+        stats["producer_blocked_seconds"] = round(stats["producer_blocked_seconds"], 3)
+        stats["depth"] = self._queue.qsize()
+        stats["capacity"] = self._queue.maxsize
+        return stats
+
+    def close(self, timeout: Optional[float] = None) -> Dict:
+        """Write everything still queued, stop the thread and return the final stats"""
+        if self._closed:
+            return self.get_stats()
+        self._closed = True
+        if self._thread is not None:
+            self._queue.put(_STOP)
+            self._thread.join(timeout)
+            if self._thread.is_alive():
+                logger.error(f"DB writer did not drain within {timeout}s, {self._queue.qsize()} records left")
+        stats = self.get_stats()
+        logger.info(f"DB writer closed: {stats}")
+        return stats
+
+
+_writer: Optional[DbWriter] = None
+_writer_lock = threading.Lock()
+
+
+def get_db_writer() -> DbWriter:
+    """Process-wide writer storing through save_cars_to_database; drained at interpreter exit"""
+    global _writer
+    with _writer_lock:
+        if _writer is None or _writer._closed:
+            from db_operations import save_cars_to_database
+            _writer = DbWriter(save_cars_to_database).start()
+        return _writer
+
+
+def flush_db_writer(timeout: Optional[float] = None) -> bool:
+    """Wait for the process-wide writer, if one is running, to write what it holds"""
+    with _writer_lock:
+        writer = _writer
+    return writer.flush(timeout) if writer is not None else True
+
+
+def close_db_writer(timeout: Optional[float] = None) -> Optional[Dict]:
+    """Drain and stop the process-wide writer, if one is running"""
+    with _writer_lock:
+        writer = _writer
+    return writer.close(timeout) if writer is not None else None
+
+
+def get_db_writer_stats() -> Optional[Dict]:
+    with _writer_lock:
+        writer = _writer
+    return writer.get_stats() if writer is not None else None
+
+
+atexit.register(close_db_writer)
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+"""
+Warm pool of reusable Chrome drivers
+Shared by the API and the background worker so browser startup and the
+undetected-chromedriver patch step are paid once per driver, not per run
+"""
+
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+import undetected_chromedriver as uc
+from selenium.webdriver.chrome.options import Options
+
+from config_manager import Config
+from resource_blocking import apply_blocking_profile, enable_network_logging
+
+logger = logging.getLogger(__name__)
+
+
+def create_chrome_driver() -> Optional[object]:
+    """Start an optimized headless Chrome driver"""
+    options = Options()
+
+    if Config.HEADLESS_MODE:
+        options.add_argument("--headless")
+
+    # Production-ready options
+    options.add_argument("--no-sandbox")
+    options.add_argument("--disable-dev-shm-usage")
+    options.add_argument("--disable-extensions")
+    options.add_argument("--disable-gpu")
+    options.add_argument("--disable-web-security")
+    options.add_argument("--disable-blink-features=AutomationControlled")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--disable-logging")
+    options.add_argument("--disable-sync")
+    options.add_argument("--no-first-run")
+    options.add_argument("user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36")
+
+    if Config.CHROME_BINARY_PATH:
+        options.binary_location = Config.CHROME_BINARY_PATH
+
+    enable_network_logging(options)
+
+    try:
+        driver = uc.Chrome(
+            options=options,
+            driver_executable_path=Config.CHROMEDRIVER_PATH or None,
+            version_main=144
+        )
+        apply_blocking_profile(driver)
+        logger.info("Chrome driver initialized")
+        return driver
+    except Exception as e:
+        logger.error(f"Failed to init driver: {e}")
+        return None
+
+
+def _read_proc_children() -> Dict[int, List[int]]:
+    """Map parent pid -> child pids from /proc (Linux only)"""
+    children: Dict[int, List[int]] = {}
+    try:
+        for entry in os.listdir('/proc'):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f'/proc/{entry}/stat') as f:
+                    # Field 4 is the ppid; the command name may contain spaces so split after ')'
+                    ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+                children.setdefault(ppid, []).append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    except OSError:
+        pass
+    return children
+
+
+def process_tree_rss_mb(pid: Optional[int]) -> float:
+    """Resident memory of a process and all its descendants, in MB"""
+    if not pid:
+        return 0.0
+    children = _read_proc_children()
+    total_kb = 0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        total_kb += int(line.split()[1])
+                        break
+        except (OSError, ValueError):
+            pass
+        stack.extend(children.get(current, []))
+    return round(total_kb / 1024, 1)
+
+
+class DriverPool:
+    """Bounded pool of Chrome drivers with checkout/checkin, health checks and recycling"""
+
+    def __init__(self, size: Optional[int] = None, max_pages: Optional[int] = None,
+                 max_rss_mb: Optional[int] = None, factory=create_chrome_driver):
+        self.size = size or Config.DRIVER_POOL_SIZE
+        self.max_pages = max_pages or Config.DRIVER_MAX_PAGES
+        self.max_rss_mb = max_rss_mb or Config.DRIVER_MAX_RSS_MB
+        self.factory = factory
+        self._idle: List[object] = []
+        self._meta: Dict[int, Dict] = {}
+        self._cond = threading.Condition()
+        self._closed = False
+        self.stats = {"created": 0, "recycled": 0, "unhealthy": 0, "checkouts": 0}
+
+    @property
+    def total(self) -> int:
+        return len(self._meta)
+
+    def warm(self, count: Optional[int] = None):
+        """Start drivers ahead of time so the first checkout does not pay startup"""
+        count = min(self.size, Config.DRIVER_POOL_WARM if count is None else count)
+        while True:
+            with self._cond:
+                if self._closed or self.total >= count:
+                    return
+                # Reserve the slot before starting Chrome outside the lock
+                placeholder = object()
+                self._meta[id(placeholder)] = {}
+            driver = self._create()
+            with self._cond:
+                del self._meta[id(placeholder)]
+                if driver is None:
+                    return
+                self._register(driver)
+                self._idle.append(driver)
+                self._cond.notify()
+
+    def checkout(self, timeout: Optional[float] = None) -> Optional[object]:
+        """Take a healthy driver from the pool, starting one if below size"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        while True:
+            with self._cond:
+                while not self._idle and self.total >= self.size and not self._closed:
+                    remaining = deadline - time.monotonic() if deadline is not None else None
+                    if remaining is not None and remaining <= 0:
+                        logger.warning("Driver pool checkout timed out")
+                        return None
+                    self._cond.wait(remaining)
+                if self._closed:
+                    return None
+                if self._idle:
+                    driver = self._idle.pop()
+                else:
+                    driver = None
+                    placeholder = object()
+                    self._meta[id(placeholder)] = {}
+
+            if driver is None:
+                driver = self._create()
+                with self._cond:
+                    del self._meta[id(placeholder)]
+                    if driver is None:
+                        self._cond.notify()
+                        return None
+                    self._register(driver)
+
+            if self._is_healthy(driver):
+                with self._cond:
+                    self.stats["checkouts"] += 1
+                    self._meta[id(driver)]["checked_out_at"] = time.monotonic()
+                return driver
+
+            with self._cond:
+                self.stats["unhealthy"] += 1
+            logger.warning("Discarding unhealthy pooled driver")
+            self._discard(driver)
+
+    def checkin(self, driver, pages: int = 0, healthy: bool = True):
+        """Return a driver; recycle it if it is unhealthy, worn out or too large"""
+        if driver is None:
+            return
+        with self._cond:
+            meta = self._meta.get(id(driver))
+            if meta is not None:
+                meta["pages"] += pages
+                meta.pop("checked_out_at", None)
+                pages_total = meta["pages"]
+        if meta is None:
+            # Not created by this pool (or already discarded): quit it rather than leak its Chrome
+            logger.warning("Checkin of a driver the pool does not track; quitting it")
+            self._discard(driver)
+            return
+
+        reason = None
+        if not healthy:
+            reason = "unhealthy"
+        elif self._closed:
+            reason = "pool closed"
+        elif pages_total >= self.max_pages:
+            reason = f"served {pages_total} pages"
+        else:
+            rss = process_tree_rss_mb(getattr(driver, 'browser_pid', None))
+            if rss > self.max_rss_mb:
+                reason = f"RSS {rss}MB over limit"
+
+        if reason:
+            logger.info(f"Recycling pooled driver: {reason}")
+            with self._cond:
+                self.stats["recycled"] += 1
+            self._discard(driver)
+            return
+
+        with self._cond:
+            self._idle.append(driver)
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None):
+        """Context manager around checkout/checkin; yields None if no driver is available"""
+        driver = self.checkout(timeout)
+        healthy = True
+        try:
+            yield driver
+        except Exception:
+            healthy = False
+            raise
+        finally:
+            if driver is not None:
+                self.checkin(driver, healthy=healthy)
+
+    def get_stats(self) -> Dict:
+        """Pool occupancy and lifecycle counters"""
+        with self._cond:
+            drivers = [m for m in self._meta.values() if m]
+            return {
+                "size": self.size,
+                "total": self.total,
+                "idle": len(self._idle),
+                "in_use": sum(1 for m in drivers if "checked_out_at" in m),
+                **self.stats,
+            }
+
+    def close_all(self):
+        """Quit every driver and refuse further checkouts"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._cond.notify_all()
+        for driver in idle:
+            self._discard(driver)
+        logger.info("Driver pool closed")
+
+    def _create(self) -> Optional[object]:
+        driver = self.factory()
+        if driver is not None:
+            with self._cond:
+                self.stats["created"] += 1
+        return driver
+
+    def _register(self, driver):
+        self._meta[id(driver)] = {"pages": 0, "created_at": time.monotonic()}
+
+    def _is_healthy(self, driver) -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def _discard(self, driver):
+        try:
+            driver.quit()
+        except Exception as e:
+            logger.warning(f"Error closing driver: {e}")
+        with self._cond:
+            self._meta.pop(id(driver), None)
+            self._cond.notify()
+
+
+_pool: Optional[DriverPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_driver_pool() -> DriverPool:
+    """Process-wide driver pool shared by the API and the worker"""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = DriverPool()
+        return _pool
@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Listing fields from a detail page's embedded structured data
+Decodes schema.org JSON-LD and the serialized app state
+(window.__INITIAL_STATE__ / __NEXT_DATA__) straight from the raw HTML with
+a regex scan and a JSON parser, with no DOM tree. Raw values (numbers,
+ISO dates, schema.org enums) are formatted the way the rendered page shows
+them in its language, so a record is the same whichever path produced it;
+text the page data already localizes is kept as is. Fields missing here are
+taken from the DOM extractors (see scraper.parse_listing_html).
+"""
+
+import json
+import logging
+import re
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+try:
+    import orjson
+    _loads = orjson.loads
+    JSON_BACKEND = "orjson"
+except ImportError:
+    _loads = json.loads
+    JSON_BACKEND = "json"
+
+from normalize import KW_PER_HP
+
+logger = logging.getLogger(__name__)
+
+SCRIPT_RE = re.compile(r"<script\b([^>]*)>(.*?)</script>", re.IGNORECASE | re.DOTALL)
+STATE_ASSIGN_RE = re.compile(r"^\s*window\.(__INITIAL_STATE__|__PRELOADED_STATE__)\s*=\s*")
+HTML_LANG_RE = re.compile(r"<html\b[^>]*\blang=[\"']?([a-zA-Z]{2})", re.IGNORECASE)
+ISO_MONTH_RE = re.compile(r"^(\d{4})-(\d{2})(?:-\d{2})?(?:T.*)?$")
+
+CURRENCY_SYMBOLS = {"EUR": "€", "USD": "$", "GBP": "£", "CHF": "CHF"}
+UNIT_CODES = {"KMT": "km", "KWT": "kW", "CMQ": "cm³", "SMI": "mi"}
+
+# How the rendered page writes values, per page language (the scraper requests lang=en)
+PAGE_LOCALES = {
+    "en": {"group": ",", "decimal": ".", "currency_first": True, "hp": "hp",
+           "conditions": {"used": "Used vehicle", "new": "New vehicle", "damaged": "Damaged vehicle"}},
+    "de": {"group": ".", "decimal": ",", "currency_first": False, "hp": "PS",
+           "conditions": {"used": "Gebrauchtfahrzeug", "new": "Neufahrzeug", "damaged": "Unfallfahrzeug"}},
+}
+DEFAULT_LOCALE = "en"
+
+# App state: dotted paths tried in order inside the listing object (located by its id)
+STATE_FIELD_PATHS: Dict[str, List[str]] = {
+    "title": ["title", "makeModel"],
+    "price": ["price.grossAmount", "price.gross", "price.localized"],
+    "mileage": ["attributes.mileage", "mileage"],
+    "power": ["attributes.power", "power"],
+    "fuel_type": ["attributes.fuel", "fuel"],
+    "transmission": ["attributes.transmission", "transmission"],
+    "first_registration": ["attributes.firstRegistration", "firstRegistration"],
+    "cubic_capacity": ["attributes.cubicCapacity", "cubicCapacity"],
+    "drive_type": ["attributes.driveType", "driveType"],
+    "category": ["category", "attributes.category"],
+    "vehicle_condition": ["condition", "attributes.condition"],
+    "dealer": ["contactInfo.name", "seller.name"],
+    "location": ["contactInfo.location", "seller.address"],
+    "seller_type": ["sellerType", "contactInfo.typeLocalized"],
+    "features": ["features"],
+    "img_urls": ["images"],
+}
+
+# Fields the embedded sources can supply
+EMBEDDED_FIELDS = tuple(STATE_FIELD_PATHS)
+
+# Every scraped field the car record stores (db_operations._car_record); the
+# DOM walk can only be skipped when the embedded data fills all of them,
+# otherwise the upsert would overwrite the missing columns with NULL
+LISTING_FIELDS = (
+    "title", "additional_info", "price", "dealer_rating", "dealer", "seller_type", "location",
+    "phone", "rating", "negotiable", "monthly_rate", "monthly_rate_href", "financing_link",
+    "mileage", "power", "fuel_type", "transmission", "first_registration", "vehicle_condition",
+    "category", "model_range", "trim_line", "vehicle_number", "origin", "cubic_capacity",
+    "drive_type", "energy_consumption", "co2_emissions", "co2_class", "fuel_consumption",
+    "features", "img_urls",
+)
+
+
+def iter_json_blocks(html: str) -> Iterator[Any]:
+    """Decoded JSON-LD blocks and app-state objects found in script tags"""
+    for match in SCRIPT_RE.finditer(html):
+        attrs, body = match.group(1), match.group(2).strip()
+        if not body:
+            continue
+        if "ld+json" in attrs or "__NEXT_DATA__" in attrs:
+            payload = body
+        else:
+            assign = STATE_ASSIGN_RE.match(body)
+            if not assign:
+                continue
+            payload = body[assign.end():].rstrip().rstrip(";")
+        try:
+            yield _loads(payload)
+        except ValueError as e:
+            logger.debug(f"Skipping undecodable script block: {e}")
+
+
+def page_locale(html: str) -> Dict:
+    """Display conventions of the page, from its <html lang> attribute"""
+    match = HTML_LANG_RE.search(html[:2048])
+    lang = match.group(1).lower() if match else DEFAULT_LOCALE
+    return PAGE_LOCALES.get(lang, PAGE_LOCALES[DEFAULT_LOCALE])
+
+
+def _number(value) -> Optional[float]:
+    if isinstance(value, bool):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _text(value) -> Optional[str]:
+    """Non-numeric values are already display text"""
+    return str(value) if value not in (None, "") else None
+
+
+def _format_number(value, locale: Dict) -> Optional[str]:
+    number = _number(value)
+    if number is None:
+        return _text(value)
+    text = f"{number:,.0f}" if number == int(number) else f"{number:,.1f}"
+    return text.translate({ord(","): locale["group"], ord("."): locale["decimal"]})
+
+
+def _quantity(value, default_unit: str, locale: Dict) -> Optional[str]:
+    """schema.org QuantitativeValue (or a bare number) as "12,345 km" """
+    if isinstance(value, dict):
+        default_unit = UNIT_CODES.get(value.get("unitCode"), default_unit)
+        value = value.get("value")
+    if _number(value) is None:
+        return _text(value)
+    return f"{_format_number(value, locale)} {default_unit}".strip()
+
+
+def _money(amount, currency: str, locale: Dict) -> Optional[str]:
+    if _number(amount) is None:
+        return _text(amount)
+    symbol = CURRENCY_SYMBOLS.get(currency or "EUR", currency or "")
+    number = _format_number(amount, locale)
+    if locale["currency_first"]:
+        return f"{symbol}{number}" if len(symbol) == 1 else f"{symbol} {number}"
+    return f"{number} {symbol}"
+
+
+def _price(value, locale: Dict) -> Optional[str]:
+    """schema.org offers (or a bare amount in EUR) as the page shows the price"""
+    if isinstance(value, list):
+        value = value[0] if value else None
+    if isinstance(value, dict):
+        return _money(value.get("price"), value.get("priceCurrency", "EUR"), locale)
+    return _money(value, "EUR", locale)
+
+
+def _power(value, locale: Dict) -> Optional[str]:
+    """Engine power in kW as "110 kW (150 hp)" """
+    if isinstance(value, dict):
+        value = value.get("value")
+    kw = _number(value)
+    if kw is None:
+        return _text(value)
+    hp = round(kw / KW_PER_HP)
+    return f"{_format_number(kw, locale)} kW ({_format_number(hp, locale)} {locale['hp']})"
+
+
+def _registration(value, locale: Dict) -> Optional[str]:
+    """ISO date as month/year ("2019-03-01" -> "03/2019")"""
+    match = ISO_MONTH_RE.match(str(value)) if value else None
+    if match:
+        return f"{match.group(2)}/{match.group(1)}"
+    return _text(value)
+
+
+def _condition(value, locale: Dict) -> Optional[str]:
+    """schema.org item condition or state enum as the page label ("UsedCondition" -> "Used vehicle")"""
+    if not isinstance(value, str):
+        return _text(value)
+    # "https://schema.org/UsedCondition" / "USED" -> "used"
+    key = value.rsplit("/", 1)[-1].replace("Condition", "").lower()
+    return locale["conditions"].get(key, value)
+
+
+# Field -> formatter turning raw structured values into page text
+VALUE_FORMATTERS: Dict[str, Callable[[Any, Dict], Optional[str]]] = {
+    "price": _price,
+    "mileage": lambda value, locale: _quantity(value, "km", locale),
+    "power": _power,
+    "cubic_capacity": lambda value, locale: _quantity(value, "cm³", locale),
+    "first_registration": _registration,
+    "vehicle_condition": _condition,
+}
+
+
+def _address(address) -> Optional[str]:
+    if isinstance(address, str):
+        return address
+    if isinstance(address, dict):
+        # Written like the seller block: "DE-10115 Berlin"
+        country, postal = address.get("addressCountry"), address.get("postalCode")
+        if isinstance(country, dict):
+            country = country.get("name")
+        zone = f"{country}-{postal}" if country and postal else postal
+        text = " ".join(str(p) for p in (zone, address.get("addressLocality")) if p)
+        return text or None
+    return None
+
+
+def _is_vehicle(node: Dict) -> bool:
+    types = node.get("@type")
+    types = types if isinstance(types, list) else [types]
+    return any(t in ("Car", "Vehicle", "Motorcycle", "Product") for t in types)
+
+
+def _iter_ld_nodes(block) -> Iterator[Dict]:
+    if isinstance(block, list):
+        for item in block:
+            yield from _iter_ld_nodes(item)
+    elif isinstance(block, dict):
+        yield block
+        if "@graph" in block:
+            yield from _iter_ld_nodes(block["@graph"])
+
+
+def fields_from_json_ld(node: Dict, locale: Optional[Dict] = None) -> Dict:
+    """Listing fields from a schema.org Car/Vehicle/Product node"""
+    locale = locale or PAGE_LOCALES[DEFAULT_LOCALE]
+    engine = node.get("vehicleEngine") or {}
+    if isinstance(engine, list):
+        engine = engine[0] if engine else {}
+    if not isinstance(engine, dict):
+        engine = {}
+    offers = node.get("offers")
+    offer = offers[0] if isinstance(offers, list) and offers else offers
+    seller = offer.get("seller") if isinstance(offer, dict) else None
+    images = node.get("image") or []
+    if isinstance(images, (str, dict)):
+        images = [images]
+
+    raw = {
+        "title": node.get("name"),
+        "price": offers,
+        "mileage": node.get("mileageFromOdometer"),
+        "power": engine.get("enginePower"),
+        "cubic_capacity": engine.get("engineDisplacement"),
+        "fuel_type": node.get("fuelType") or engine.get("fuelType"),
+        "transmission": node.get("vehicleTransmission"),
+        "first_registration": node.get("dateVehicleFirstRegistered") or node.get("productionDate"),
+        "drive_type": node.get("driveWheelConfiguration"),
+        "vehicle_condition": node.get("itemCondition"),
+        "category": node.get("bodyType"),
+        "model_range": node.get("model") if isinstance(node.get("model"), str) else None,
+        "dealer": seller.get("name") if isinstance(seller, dict) else None,
+        "location": _address(seller.get("address")) if isinstance(seller, dict) else None,
+    }
+    fields = {}
+    for field, value in raw.items():
+        if value in (None, "", []):
+            continue
+        formatter = VALUE_FORMATTERS.get(field)
+        value = formatter(value, locale) if formatter else value
+        if value:
+            fields[field] = value
+    image_urls = _image_urls([{"url": i.get("contentUrl") or i.get("url")} if isinstance(i, dict) else i
+                              for i in images])
+    if image_urls:
+        fields["img_urls"] = image_urls
+    return fields
+
+
+def _find_listing(state, listing_id: str, depth: int = 0) -> Optional[Dict]:
+    """The object in an app state whose id is the listing id"""
+    if depth > 12:
+        return None
+    if isinstance(state, dict):
+        if str(state.get("id", "")) == listing_id and ("title" in state or "price" in state):
+            return state
+        children = state.values()
+    elif isinstance(state, list):
+        children = state
+    else:
+        return None
+    for child in children:
+        if isinstance(child, (dict, list)):
+            found = _find_listing(child, listing_id, depth + 1)
+            if found is not None:
+                return found
+    return None
+
+
+def _lookup(obj, path: str):
+    for part in path.split("."):
+        if not isinstance(obj, dict):
+            return None
+        obj = obj.get(part)
+    return obj
+
+
+def _state_value(value):
+    """App state leaf; localized wrappers are unwrapped to their display text"""
+    if isinstance(value, dict):
+        for key in ("formatted", "localized", "value", "label", "name"):
+            if value.get(key) not in (None, ""):
+                return _state_value(value[key])
+        return None
+    if isinstance(value, list):
+        items = [_state_value(v) if isinstance(v, dict) else v for v in value]
+        items = [i for i in items if i]
+        return items or None
+    if value is False or value == "":
+        return None
+    return value
+
+
+def fields_from_state(state, listing_id: str, locale: Optional[Dict] = None) -> Dict:
+    """Listing fields from a serialized app state, following STATE_FIELD_PATHS"""
+    locale = locale or PAGE_LOCALES[DEFAULT_LOCALE]
+    listing = _find_listing(state, listing_id) if listing_id else None
+    if listing is None:
+        return {}
+    fields = {}
+    for field, paths in STATE_FIELD_PATHS.items():
+        for path in paths:
+            raw = _lookup(listing, path)
+            if field == "img_urls":
+                value = _image_urls(raw)
+            else:
+                value = _state_value(raw)
+                if field in VALUE_FORMATTERS:
+                    value = VALUE_FORMATTERS[field](value, locale) if value is not None else None
+                elif _number(value) is not None:
+                    value = _format_number(value, locale)
+            if value:
+                fields[field] = value
+                break
+    return fields
+
+
+def _image_urls(images) -> List[str]:
+    if not isinstance(images, list):
+        return []
+    urls = []
+    for image in images:
+        if isinstance(image, dict):
+            image = image.get("url") or image.get("uri") or image.get("src")
+        if isinstance(image, str) and image:
+            urls.append(image)
+    return urls
+
+
+def extract_embedded_fields(html: str, listing_id: str = "") -> Dict:
+    """
+    Listing fields decoded from embedded JSON; JSON-LD wins over app state
+    for fields both provide. Returns only the fields that were found.
+    """
+    locale = page_locale(html)
+    ld_fields: Dict = {}
+    state_fields: Dict = {}
+    for block in iter_json_blocks(html):
+        if isinstance(block, dict) and ("@context" in block or "@graph" in block) or isinstance(block, list):
+            for node in _iter_ld_nodes(block):
+                if _is_vehicle(node):
+                    for key, value in fields_from_json_ld(node, locale).items():
+                        ld_fields.setdefault(key, value)
+        elif not state_fields:
+            state_fields = fields_from_state(block, listing_id, locale)
+    return {**state_fields, **ld_fields}
+
+
+def covers_listing(fields: Dict) -> bool:
+    """True if the embedded data fills every stored listing field (LISTING_FIELDS)"""
+    return all(fields.get(name) for name in LISTING_FIELDS)
@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+HTTP-first page fetcher
+Tries a pooled keep-alive HTTP session and falls back to the Chrome driver
+on bot challenges or missing content
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from selenium.common.exceptions import TimeoutException
+
+from config_manager import Config
+from rate_limiter import get_host_limiter
+from adaptive_throttle import classify_fetch, get_controller
+from resource_blocking import collect_page_report
+from page_waits import wait_for_document_ready
+from html_archive import archive_page
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Markers of an anti-bot interstitial instead of the real page
+BLOCK_MARKERS = (
+    "Access denied",
+    "Zugriff verweigert",
+    "captcha",
+    "challenge-platform",
+    "_Incapsula_Resource",
+)
+
+# At least one of these must be present for a detail page to count as rendered
+CONTENT_MARKERS = (
+    'data-testid="vip-price-label"',
+    'data-testid="vip-key-features-list-item',
+    "<dt",
+)
+
+# Search result pages count as rendered once they contain listing cards
+RESULT_PAGE_MARKERS = ("<article",)
+
+
+def build_http_session(pool_size: Optional[int] = None) -> requests.Session:
+    """Create a keep-alive session with a connection pool sized for the scraper"""
+    pool_size = pool_size or Config.HTTP_POOL_SIZE
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers.update({
+        "User-Agent": USER_AGENT,
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-US,en;q=0.9,de;q=0.8",
+    })
+    return session
+
+
+def detect_fallback_reason(status_code: int, html: str, content_markers=CONTENT_MARKERS) -> Optional[str]:
+    """Return why an HTTP response is unusable, or None if it looks like a real page"""
+    if status_code >= 400:
+        return f"http_{status_code}"
+    head = html[:20000]
+    for marker in BLOCK_MARKERS:
+        if marker in head:
+            return "challenge"
+    if not any(marker in html for marker in content_markers):
+        return "missing_content"
+    return None
+
+
+class DetailFetcher:
+    """Fetch detail pages over HTTP first, using the Chrome driver only as fallback"""
+
+    def __init__(self, driver=None, session: Optional[requests.Session] = None,
+                 driver_pool=None, rate_limiter=None, content_markers=CONTENT_MARKERS):
+        self.driver = driver
+        self.content_markers = content_markers
+        self.driver_pool = driver_pool
+        self._pooled_driver = False
+        self.rate_limiter = rate_limiter or get_host_limiter()
+        self.controller = get_controller() if Config.ADAPTIVE_THROTTLE_ENABLED else None
+        self.session = session or build_http_session()
+        self.http_enabled = Config.HTTP_FETCH_ENABLED
+        self._lock = threading.Lock()
+        self.stats = {"http": 0, "driver": 0, "failed": 0}
+        self.fallback_reasons: Dict[str, int] = {}
+
+    def fetch(self, url: str) -> Dict:
+        """
+        Fetch a page and report which path served it
+        Returns dict with url, html, via ('http' | 'driver' | 'failed'),
+        status_code, elapsed and fallback_reason
+        """
+        start = time.monotonic()
+        result = {"url": url, "html": None, "via": "failed", "status_code": None,
+                  "elapsed": 0.0, "rate_wait": 0.0, "fallback_reason": None}
+        self._rate_wait = 0.0
+
+        if self.http_enabled:
+            html, status_code, reason = self._fetch_http(url)
+            result["status_code"] = status_code
+            if reason is None:
+                result.update(html=html, via="http")
+            else:
+                result["fallback_reason"] = reason
+
+        if result["via"] != "http" and self._ensure_driver():
+            html, reason = self._fetch_driver(url)
+            if html:
+                result.update(html=html, via="driver")
+            elif reason:
+                result["fallback_reason"] = reason
+
+        result["rate_wait"] = round(self._rate_wait, 3)
+        result["elapsed"] = round(time.monotonic() - start, 3)
+        if result["html"]:
+            archive_page(url, result["html"], via=result["via"])
+        self._record(result)
+        if self.controller is not None:
+            self.controller.record(classify_fetch(result), result["elapsed"] - result["rate_wait"])
+        logger.info(f"Fetched via {result['via']} in {result['elapsed']}s"
+                     f"{' (' + result['fallback_reason'] + ')' if result['fallback_reason'] else ''} -> {url}")
+        return result
+
+    def _ensure_driver(self) -> bool:
+        """Check out a fallback driver from the pool on first use"""
+        if self.driver is None and self.driver_pool is not None:
+            self.driver = self.driver_pool.checkout()
+            self._pooled_driver = self.driver is not None
+        return self.driver is not None
+
+    def _fetch_http(self, url: str):
+        """Plain GET over the pooled session; returns (html, status_code, fallback_reason)"""
+        self._rate_wait += self.rate_limiter.acquire(url)
+        try:
+            response = self.session.get(url, timeout=Config.HTTP_TIMEOUT)
+            html = response.text
+            return html, response.status_code, detect_fallback_reason(response.status_code, html, self.content_markers)
+        except requests.Timeout:
+            return None, None, "timeout"
+        except requests.RequestException as e:
+            logger.debug(f"HTTP fetch error for {url}: {e}")
+            return None, None, "connection_error"
+
+    def _fetch_driver(self, url: str):
+        """Render the page in Chrome and reuse its cookies; returns (html, failure_reason)"""
+        self._rate_wait += self.rate_limiter.acquire(url)
+        try:
+            self.driver.get(url)
+            # Pacing comes from the host rate limiter; only wait for the page itself
+            wait_for_document_ready(self.driver, Config.HTTP_TIMEOUT)
+            title = self.driver.title or ""
+            if any(marker in title for marker in BLOCK_MARKERS):
+                logger.warning(f"Driver blocked on {url}: {title}")
+                return None, "challenge"
+            html = self.driver.page_source
+            collect_page_report(self.driver)
+            self._sync_cookies_from_driver()
+            return html, None
+        except TimeoutException:
+            return None, "timeout"
+        except Exception as e:
+            logger.error(f"Driver fetch error for {url}: {e}")
+            return None, None
+
+    def _sync_cookies_from_driver(self):
+        """Copy browser cookies (consent, bot-check tokens) into the HTTP session"""
+        try:
+            for cookie in self.driver.get_cookies():
+                self.session.cookies.set(cookie["name"], cookie["value"],
+                                         domain=cookie.get("domain"), path=cookie.get("path", "/"))
+        except Exception as e:
+            logger.debug(f"Cookie sync failed: {e}")
+
+    def _record(self, result: Dict):
+        with self._lock:
+            self.stats[result["via"]] += 1
+            reason = result["fallback_reason"]
+            if reason:
+                self.fallback_reasons[reason] = self.fallback_reasons.get(reason, 0) + 1
+
+    def get_stats(self) -> Dict:
+        """Fetch path counters and HTTP hit rate"""
+        with self._lock:
+            total = sum(self.stats.values())
+            return {
+                **self.stats,
+                "total": total,
+                "http_hit_rate": round(self.stats["http"] / total, 3) if total else 0.0,
+                "fallback_reasons": dict(self.fallback_reasons),
+            }
+
+    def close(self):
+        """Release pooled HTTP connections and any driver checked out from the pool"""
+        self.session.close()
+        if self._pooled_driver:
+            self.driver_pool.checkin(self.driver, pages=self.stats["driver"])
+            self.driver = None
+            self._pooled_driver = False
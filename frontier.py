@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+Persistent crawl frontier
+Embedded SQLite store tracking every listing URL as pending, in_flight,
+done or failed, with atomic claims so one or more processes can resume a
+crawl exactly where it stopped
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+DONE = "done"
+FAILED = "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    claimed_by TEXT,
+    claimed_at REAL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_frontier_state ON frontier (state, claimed_at);
+"""
+
+
+class Frontier:
+    """SQLite-backed URL frontier with lease-based claims"""
+
+    def __init__(self, path: Optional[str] = None, max_attempts: Optional[int] = None,
+                 lease_seconds: Optional[int] = None):
+        self.path = path or Config.FRONTIER_PATH
+        self.max_attempts = max_attempts or Config.FRONTIER_MAX_ATTEMPTS
+        self.lease_seconds = lease_seconds or Config.FRONTIER_LEASE_SECONDS
+        self._local = threading.local()
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn().executescript(SCHEMA)
+
+    def _conn(self) -> sqlite3.Connection:
+        """One connection per thread; WAL lets readers and a writer work side by side"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def add(self, urls: Iterable[str]) -> int:
+        """
+        Queue URLs for this crawl. New URLs become pending; URLs finished by
+        an earlier crawl are re-queued; pending/in-flight ones are left alone.
+        Returns the number of URLs queued.
+        """
+        now = time.time()
+        rows = [(url, now) for url in dict.fromkeys(u.strip() for u in urls if u and u.strip())]
+        if not rows:
+            return 0
+        conn = self._conn()
+        before = conn.total_changes
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(
+                "INSERT INTO frontier (url, state, updated_at) VALUES (?, 'pending', ?) "
+                "ON CONFLICT(url) DO UPDATE SET state = 'pending', attempts = 0, last_error = NULL, "
+                "updated_at = excluded.updated_at WHERE frontier.state IN ('done', 'failed')",
+                rows,
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return conn.total_changes - before
+
+    def claim(self, worker_id: str, limit: int = 1) -> List[str]:
+        """Atomically take up to `limit` pending (or lease-expired) URLs"""
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            urls = [row[0] for row in conn.execute(
+                "SELECT url FROM frontier WHERE state = 'pending' "
+                "OR (state = 'in_flight' AND claimed_at < ?) ORDER BY rowid LIMIT ?",
+                (now - self.lease_seconds, limit),
+            )]
+            conn.executemany(
+                "UPDATE frontier SET state = 'in_flight', claimed_by = ?, claimed_at = ?, updated_at = ? WHERE url = ?",
+                [(worker_id, now, now, url) for url in urls],
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return urls
+
+    def claim_one(self, worker_id: str) -> Optional[str]:
+        urls = self.claim(worker_id, 1)
+        return urls[0] if urls else None
+
+    def mark_done(self, url: str):
+        self._conn().execute(
+            "UPDATE frontier SET state = 'done', claimed_by = NULL, claimed_at = NULL, updated_at = ? WHERE url = ?",
+            (time.time(), url),
+        )
+
+    def mark_failed(self, url: str, error: str = ""):
+        """Record a failed attempt; the URL goes back to pending until max_attempts is reached"""
+        self._conn().execute(
+            "UPDATE frontier SET attempts = attempts + 1, last_error = ?, claimed_by = NULL, claimed_at = NULL, "
+            "state = CASE WHEN attempts + 1 >= ? THEN 'failed' ELSE 'pending' END, updated_at = ? WHERE url = ?",
+            (error[:500], self.max_attempts, time.time(), url),
+        )
+
+    def has_unfinished(self) -> bool:
+        """True if a previous crawl left pending or in-flight URLs behind"""
+        row = self._conn().execute(
+            "SELECT 1 FROM frontier WHERE state IN ('pending', 'in_flight') LIMIT 1"
+        ).fetchone()
+        return row is not None
+
+    def counts(self) -> Dict[str, int]:
+        """Number of URLs per state"""
+        counts = {PENDING: 0, IN_FLIGHT: 0, DONE: 0, FAILED: 0}
+        for state, count in self._conn().execute("SELECT state, COUNT(*) FROM frontier GROUP BY state"):
+            counts[state] = count
+        return counts
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
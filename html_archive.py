@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Compressed raw-HTML archive
+Append-only, content-addressed store of every fetched page so selectors can
+be fixed and pages re-parsed from disk instead of re-scraping the site.
+
+Layout under ARCHIVE_DIR:
+  segment-000001.seg ...   zlib-compressed page bodies, appended
+  index.db                 SQLite index: blobs by hash, fetches by URL and time
+Retention drops whole segments, oldest first, when they are past
+ARCHIVE_RETENTION_DAYS or the archive exceeds ARCHIVE_MAX_MB.
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import struct
+import threading
+import time
+import zlib
+from typing import Dict, Iterator, Optional, Tuple
+
+from config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+RECORD_MAGIC = b"HTA1"
+RECORD_HEADER = struct.Struct(">4sI")  # magic, compressed length
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash TEXT PRIMARY KEY,
+    segment INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    raw_size INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_blobs_segment ON blobs (segment);
+CREATE TABLE IF NOT EXISTS fetches (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    fetched_at REAL NOT NULL,
+    hash TEXT NOT NULL,
+    via TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_fetches_url_time ON fetches (url, fetched_at);
+CREATE INDEX IF NOT EXISTS ix_fetches_time ON fetches (fetched_at);
+CREATE TABLE IF NOT EXISTS segments (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    last_write_at REAL NOT NULL,
+    size INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+
+class HtmlArchive:
+    """Segmented, deduplicated page archive with an SQLite index"""
+
+    def __init__(self, directory: Optional[str] = None, segment_mb: Optional[int] = None,
+                 max_mb: Optional[int] = None, retention_days: Optional[int] = None):
+        self.directory = directory or Config.ARCHIVE_DIR
+        self.segment_bytes = (segment_mb or Config.ARCHIVE_SEGMENT_MB) * 1024 * 1024
+        self.max_bytes = (max_mb or Config.ARCHIVE_MAX_MB) * 1024 * 1024
+        self.retention_days = Config.ARCHIVE_RETENTION_DAYS if retention_days is None else retention_days
+        os.makedirs(self.directory, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._local = threading.local()
+        self._conn().executescript(SCHEMA)
+        self._puts_since_retention = 0
+
+    def _conn(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(os.path.join(self.directory, "index.db"), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _segment_path(self, segment_id: int) -> str:
+        return os.path.join(self.directory, f"segment-{segment_id:06d}.seg")
+
+    def _current_segment(self, conn, incoming: int) -> int:
+        """Id of the segment to append to, rolling over when it would grow past the limit"""
+        row = conn.execute("SELECT id, size FROM segments ORDER BY id DESC LIMIT 1").fetchone()
+        now = time.time()
+        if row is None or row[1] + incoming > self.segment_bytes:
+            cur = conn.execute("INSERT INTO segments (created_at, last_write_at) VALUES (?, ?)", (now, now))
+            return cur.lastrowid
+        return row[0]
+
+    def put(self, url: str, html: str, fetched_at: Optional[float] = None, via: Optional[str] = None) -> str:
+        """Archive one fetched page; identical bodies are stored once. Returns the content hash."""
+        raw = html.encode("utf-8")
+        digest = hashlib.sha256(raw).hexdigest()
+        fetched_at = fetched_at or time.time()
+
+        with self._write_lock:
+            conn = self._conn()
+            # The index write lock also serializes segment appends across processes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                if conn.execute("SELECT 1 FROM blobs WHERE hash = ?", (digest,)).fetchone() is None:
+                    data = zlib.compress(raw, 6)
+                    record = RECORD_HEADER.pack(RECORD_MAGIC, len(data)) + data
+                    segment_id = self._current_segment(conn, len(record))
+                    with open(self._segment_path(segment_id), "ab") as f:
+                        offset = f.tell()
+                        f.write(record)
+                    conn.execute("INSERT INTO blobs VALUES (?, ?, ?, ?, ?)",
+                                 (digest, segment_id, offset + RECORD_HEADER.size, len(data), len(raw)))
+                    conn.execute("UPDATE segments SET size = size + ?, last_write_at = ? WHERE id = ?",
+                                 (len(record), fetched_at, segment_id))
+                else:
+                    # Keep the blob's segment alive as long as it is still being fetched
+                    conn.execute("UPDATE segments SET last_write_at = MAX(last_write_at, ?) "
+                                 "WHERE id = (SELECT segment FROM blobs WHERE hash = ?)", (fetched_at, digest))
+                conn.execute("INSERT INTO fetches (url, fetched_at, hash, via) VALUES (?, ?, ?, ?)",
+                             (url, fetched_at, digest, via))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+
+            self._puts_since_retention += 1
+            if self._puts_since_retention >= 500:
+                self._puts_since_retention = 0
+                self.enforce_retention()
+        return digest
+
+    def get(self, digest: str) -> Optional[str]:
+        """Page body by content hash"""
+        row = self._conn().execute("SELECT segment, offset, length FROM blobs WHERE hash = ?", (digest,)).fetchone()
+        if row is None:
+            return None
+        segment_id, offset, length = row
+        try:
+            with open(self._segment_path(segment_id), "rb") as f:
+                f.seek(offset)
+                return zlib.decompress(f.read(length)).decode("utf-8")
+        except (OSError, zlib.error) as e:
+            logger.error(f"Archive read failed for {digest}: {e}")
+            return None
+
+    def latest(self, url: str) -> Optional[str]:
+        """Most recently archived body for a URL"""
+        row = self._conn().execute(
+            "SELECT hash FROM fetches WHERE url = ? ORDER BY fetched_at DESC LIMIT 1", (url,)
+        ).fetchone()
+        return self.get(row[0]) if row else None
+
+    def iter_latest(self, since: Optional[float] = None) -> Iterator[Tuple[str, float, str]]:
+        """Yield (url, fetched_at, html) for the newest fetch of every URL, segment by segment"""
+        rows = self._conn().execute(
+            "SELECT f.url, MAX(f.fetched_at), f.hash, b.segment, b.offset FROM fetches f "
+            "JOIN blobs b ON b.hash = f.hash WHERE f.fetched_at >= ? GROUP BY f.url "
+            "ORDER BY b.segment, b.offset",
+            (since or 0,),
+        ).fetchall()
+        for url, fetched_at, digest, _, _ in rows:
+            html = self.get(digest)
+            if html is not None:
+                yield url, fetched_at, html
+
+    def _drop_segment(self, conn, segment_id: int):
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM fetches WHERE hash IN (SELECT hash FROM blobs WHERE segment = ?)", (segment_id,))
+            conn.execute("DELETE FROM blobs WHERE segment = ?", (segment_id,))
+            conn.execute("DELETE FROM segments WHERE id = ?", (segment_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        try:
+            os.remove(self._segment_path(segment_id))
+        except FileNotFoundError:
+            pass
+
+    def enforce_retention(self) -> int:
+        """Drop the oldest segments past the age or size budget; returns segments dropped"""
+        conn = self._conn()
+        segments = conn.execute("SELECT id, last_write_at, size FROM segments ORDER BY id").fetchall()
+        if len(segments) <= 1:
+            return 0
+        cutoff = time.time() - self.retention_days * 86400 if self.retention_days else None
+        total = sum(s[2] for s in segments)
+        dropped = 0
+        # Never drop the newest (active) segment
+        for segment_id, last_write_at, size in segments[:-1]:
+            expired = cutoff is not None and last_write_at < cutoff
+            if not expired and total <= self.max_bytes:
+                break
+            self._drop_segment(conn, segment_id)
+            total -= size
+            dropped += 1
+        if dropped:
+            logger.info(f"Archive retention dropped {dropped} segment(s)")
+        return dropped
+
+    def stats(self) -> Dict:
+        conn = self._conn()
+        segments, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM segments").fetchone()
+        blobs, raw = conn.execute("SELECT COUNT(*), COALESCE(SUM(raw_size), 0) FROM blobs").fetchone()
+        fetches, urls = conn.execute("SELECT COUNT(*), COUNT(DISTINCT url) FROM fetches").fetchone()
+        return {
+            "segments": segments,
+            "bytes_on_disk": size,
+            "raw_bytes": raw,
+            "compression_ratio": round(raw / size, 2) if size else 0.0,
+            "blobs": blobs,
+            "fetches": fetches,
+            "urls": urls,
+        }
+
+
+_archive: Optional[HtmlArchive] = None
+_archive_lock = threading.Lock()
+
+
+def get_archive() -> Optional[HtmlArchive]:
+    """Process-wide archive, or None when archiving is disabled"""
+    global _archive
+    if not Config.ARCHIVE_ENABLED:
+        return None
+    with _archive_lock:
+        if _archive is None:
+            _archive = HtmlArchive()
+        return _archive
+
+
+def archive_page(url: str, html: str, via: Optional[str] = None):
+    """Best-effort archive hook for fetch paths; never raises"""
+    archive = get_archive()
+    if archive is None or not html:
+        return
+    try:
+        archive.put(url, html, via=via)
+    except Exception as e:
+        logger.warning(f"Archive write failed for {url}: {e}")
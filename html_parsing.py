@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+HTML parser backend selection
+All extractors build their trees through make_soup so the BeautifulSoup
+tree builder (lxml, html.parser, html5lib) is chosen in one place via
+HTML_PARSER; lxml is the default and html.parser the fallback
+"""
+
+import logging
+from typing import List, Optional
+
+from bs4 import BeautifulSoup, FeatureNotFound
+
+from config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+BACKENDS = ("lxml", "html.parser", "html5lib")
+FALLBACK_BACKEND = "html.parser"
+
+_unavailable = set()
+
+
+def available_backends() -> List[str]:
+    """Backends whose tree builder is installed"""
+    available = []
+    for backend in BACKENDS:
+        try:
+            BeautifulSoup("<p></p>", backend)
+            available.append(backend)
+        except FeatureNotFound:
+            continue
+    return available
+
+
+def make_soup(html, backend: Optional[str] = None, parse_only=None) -> BeautifulSoup:
+    """Parse markup with the configured backend, falling back to html.parser if it is missing"""
+    backend = backend or Config.HTML_PARSER
+    if backend not in _unavailable:
+        try:
+            return BeautifulSoup(html, backend, parse_only=parse_only)
+        except FeatureNotFound:
+            logger.warning(f"HTML parser '{backend}' is not installed, using {FALLBACK_BACKEND}")
+            _unavailable.add(backend)
+    return BeautifulSoup(html, FALLBACK_BACKEND, parse_only=parse_only)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Normalization of free-text listing values into typed numbers and dates
+"23.990 €" -> 23990, "45,000 km" -> 45000, "140 kW (190 PS)" -> (140, 190),
+"03/2021" -> 2021-03-01. Accepts both German and English digit grouping.
+
+Usage:
+  python normalize.py backfill [--batch-size N]   # fill typed columns of existing rows
+"""
+
+import argparse
+import logging
+import re
+import sys
+from datetime import date
+from typing import Dict, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Typed columns derived from the Car text columns
+NUMERIC_FIELDS = ("price_eur", "mileage_km", "power_kw", "power_hp", "first_registration_date",
+                  "cubic_capacity_ccm", "co2_g_km")
+
+KW_PER_HP = 0.73549875
+
+# A grouped integer ("23.990", "23,990", "23 990") or a plain one, with optional decimals
+NUMBER_RE = re.compile(r"(\d{1,3}(?:[.,\s\u00a0\u202f]\d{3})+|\d+)(?:[.,](\d{1,2}))?(?!\d)")
+KW_RE = re.compile(r"(\d[\d.,]*)\s*kW", re.IGNORECASE)
+HP_RE = re.compile(r"(\d[\d.,]*)\s*(?:PS|hp|bhp|CV)\b", re.IGNORECASE)
+MONTH_YEAR_RE = re.compile(r"\b(\d{1,2})\s*[/.-]\s*(\d{4})\b")
+ISO_DATE_RE = re.compile(r"\b(\d{4})-(\d{1,2})(?:-\d{1,2})?\b")
+YEAR_RE = re.compile(r"\b(19\d{2}|20\d{2})\b")
+
+
+def parse_int(text: Optional[str]) -> Optional[int]:
+    """First number in the text, ignoring digit grouping and rounding decimals away"""
+    if not text:
+        return None
+    match = NUMBER_RE.search(str(text))
+    if not match:
+        return None
+    value = int(re.sub(r"\D", "", match.group(1)))
+    if match.group(2) and int(match.group(2).ljust(2, "0")) >= 50:
+        value += 1
+    return value
+
+
+def parse_price(text: Optional[str]) -> Optional[int]:
+    """Price in whole euros"""
+    return parse_int(text)
+
+
+def parse_mileage(text: Optional[str]) -> Optional[int]:
+    """Mileage in km"""
+    return parse_int(text)
+
+
+def parse_power(text: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """(kW, hp); the missing unit is derived from the other"""
+    if not text:
+        return None, None
+    kw_match = KW_RE.search(text)
+    hp_match = HP_RE.search(text)
+    kw = parse_int(kw_match.group(1)) if kw_match else None
+    hp = parse_int(hp_match.group(1)) if hp_match else None
+    if kw is None and hp is None:
+        return None, None
+    if kw is None:
+        kw = round(hp * KW_PER_HP)
+    if hp is None:
+        hp = round(kw / KW_PER_HP)
+    return kw, hp
+
+
+def parse_registration(text: Optional[str]) -> Optional[date]:
+    """First registration as the first day of its month ("03/2021", "2021-03", "2021")"""
+    if not text:
+        return None
+    text = str(text)
+    match = MONTH_YEAR_RE.search(text)
+    if match:
+        month, year = int(match.group(1)), int(match.group(2))
+    else:
+        match = ISO_DATE_RE.search(text)
+        if match:
+            year, month = int(match.group(1)), int(match.group(2))
+        else:
+            match = YEAR_RE.search(text)
+            if not match:
+                return None
+            year, month = int(match.group(1)), 1
+    if not 1 <= month <= 12 or not 1900 <= year <= 2100:
+        return None
+    return date(year, month, 1)
+
+
+def normalize_car_fields(car: Dict) -> Dict:
+    """Typed column values for a car record keyed by the Car text columns"""
+    power_kw, power_hp = parse_power(car.get("power"))
+    return {
+        "price_eur": parse_price(car.get("price")),
+        "mileage_km": parse_mileage(car.get("mileage")),
+        "power_kw": power_kw,
+        "power_hp": power_hp,
+        "first_registration_date": parse_registration(car.get("first_registration")),
+        "cubic_capacity_ccm": parse_int(car.get("cubic_capacity")),
+        "co2_g_km": parse_int(car.get("co2_emissions")),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Typed column maintenance")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per UPDATE batch")
+    parser.add_argument("--all", action="store_true", help="re-normalize every row, not only unfilled ones")
+    args = parser.parse_args(argv)
+
+    from db_operations import backfill_numeric_columns
+    result = backfill_numeric_columns(batch_size=args.batch_size, only_missing=not args.all)
+    logger.info(f"Backfill finished: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main(sys.argv[1:])
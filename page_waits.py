@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""
+Event-driven page waits
+Return as soon as the page has actually changed instead of sleeping a
+fixed amount, and record how long each wait really took
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from selenium.common.exceptions import StaleElementReferenceException, TimeoutException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support.ui import WebDriverWait
+from selenium.webdriver.support import expected_conditions as EC
+
+logger = logging.getLogger(__name__)
+
+ARTICLE_SELECTOR = "article"
+RESULT_COUNT_SELECTOR = '[data-testid="srp-title"]'
+POLL_FREQUENCY = 0.1
+NETWORK_IDLE_SECONDS = 0.5
+
+
+class WaitStats:
+    """Per-wait-type timing counters"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats: Dict[str, Dict] = {}
+
+    def record(self, name: str, elapsed: float, timed_out: bool = False):
+        with self._lock:
+            entry = self._stats.setdefault(name, {"count": 0, "total": 0.0, "max": 0.0, "timeouts": 0})
+            entry["count"] += 1
+            entry["total"] += elapsed
+            entry["max"] = max(entry["max"], elapsed)
+            if timed_out:
+                entry["timeouts"] += 1
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                name: {
+                    "count": e["count"],
+                    "avg_seconds": round(e["total"] / e["count"], 3) if e["count"] else 0.0,
+                    "max_seconds": round(e["max"], 3),
+                    "total_seconds": round(e["total"], 3),
+                    "timeouts": e["timeouts"],
+                }
+                for name, e in self._stats.items()
+            }
+
+
+wait_stats = WaitStats()
+
+
+def _text_or_none(driver, selector: str) -> Optional[str]:
+    try:
+        elements = driver.find_elements(By.CSS_SELECTOR, selector)
+        return elements[0].text if elements else None
+    except Exception:
+        return None
+
+
+def _is_stale(element) -> bool:
+    try:
+        element.is_enabled()
+        return False
+    except StaleElementReferenceException:
+        return True
+
+
+class _NetworkIdle:
+    """True once no new resource entries have appeared for NETWORK_IDLE_SECONDS"""
+
+    def __init__(self):
+        self.count = None
+        self.changed_at = time.monotonic()
+
+    def __call__(self, driver) -> bool:
+        count = driver.execute_script(
+            "return document.readyState === 'complete' ? performance.getEntriesByType('resource').length : -1"
+        )
+        now = time.monotonic()
+        if count != self.count:
+            self.count = count
+            self.changed_at = now
+            return False
+        return count >= 0 and now - self.changed_at >= NETWORK_IDLE_SECONDS
+
+
+def wait_for_document_ready(driver, timeout: float = 10, name: str = "document_ready") -> bool:
+    """Wait until the document has finished loading"""
+    start = time.monotonic()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(
+            lambda d: d.execute_script("return document.readyState") == "complete"
+        )
+        wait_stats.record(name, time.monotonic() - start)
+        return True
+    except TimeoutException:
+        wait_stats.record(name, time.monotonic() - start, timed_out=True)
+        logger.debug(f"{name} wait timed out after {timeout}s")
+        return False
+
+
+def wait_for_clickable(driver, element, timeout: float = 5, name: str = "clickable") -> bool:
+    """Wait until an element (e.g. just scrolled into view) can be clicked"""
+    start = time.monotonic()
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY).until(EC.element_to_be_clickable(element))
+        wait_stats.record(name, time.monotonic() - start)
+        return True
+    except TimeoutException:
+        wait_stats.record(name, time.monotonic() - start, timed_out=True)
+        return False
+
+
+def snapshot_results(driver) -> Dict:
+    """Capture what identifies the current result page, taken before navigating"""
+    try:
+        articles: List = driver.find_elements(By.CSS_SELECTOR, ARTICLE_SELECTOR)
+    except Exception:
+        articles = []
+    return {
+        "first_article": articles[0] if articles else None,
+        "result_count": _text_or_none(driver, RESULT_COUNT_SELECTOR),
+    }
+
+
+def wait_for_page_transition(driver, snapshot: Dict, timeout: float = 10,
+                             name: str = "page_transition") -> bool:
+    """
+    Wait until the result page has been replaced.
+    Done when the old first article went stale, the result count changed,
+    or (with nothing to compare against) the network went idle;
+    then waits for the new article list to be present.
+    """
+    start = time.monotonic()
+    network_idle = _NetworkIdle()
+    old_article = snapshot.get("first_article")
+
+    def transitioned(d) -> bool:
+        if old_article is not None and _is_stale(old_article):
+            return True
+        count = snapshot.get("result_count")
+        if count is not None and _text_or_none(d, RESULT_COUNT_SELECTOR) not in (None, count):
+            return True
+        return old_article is None and network_idle(d)
+
+    try:
+        wait = WebDriverWait(driver, timeout, poll_frequency=POLL_FREQUENCY)
+        wait.until(transitioned)
+        wait.until(EC.presence_of_element_located((By.CSS_SELECTOR, ARTICLE_SELECTOR)))
+        wait_stats.record(name, time.monotonic() - start)
+        return True
+    except TimeoutException:
+        wait_stats.record(name, time.monotonic() - start, timed_out=True)
+        logger.warning(f"Page transition not detected within {timeout}s")
+        return False
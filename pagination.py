@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Keyset (cursor) pagination over an indexed sort key
+A page continues strictly after the (sort value, id) of the previous page's
+last row, so every page is an index range scan no matter how deep it is, and
+rows inserted meanwhile never shift or repeat pages. Continuation tokens are
+opaque URL-safe strings carrying the sort and that last key.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import List, Optional, Tuple
+
+from sqlalchemy import tuple_
+
+from database import Car
+
+# Sort name -> column; each is paired with Car.id as tiebreaker (see the composite indexes on Car)
+SORT_COLUMNS = {
+    "id": Car.id,
+    "created_at": Car.created_at,
+}
+SORT_PATTERN = r"^-?(id|created_at)$"
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def parse_sort(sort: str) -> Tuple[str, bool]:
+    """'created_at' / '-created_at' -> (column name, descending)"""
+    descending = sort.startswith("-")
+    name = sort.lstrip("-")
+    if name not in SORT_COLUMNS:
+        raise InvalidCursor(f"Unknown sort: {sort}")
+    return name, descending
+
+
+def _encode_value(value):
+    return value.isoformat() if isinstance(value, datetime) else value
+
+
+def _decode_value(name: str, value):
+    if name == "id":
+        return int(value)
+    return datetime.fromisoformat(value)
+
+
+def encode_cursor(sort: str, row) -> str:
+    """Continuation token for the page after row"""
+    name, _ = parse_sort(sort)
+    payload = {"s": sort, "k": [_encode_value(getattr(row, name)), row.id]}
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(token: str, sort: str) -> List:
+    """[sort value, id] from a token issued for the same sort"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        if payload["s"] != sort:
+            raise InvalidCursor("Cursor was issued for a different sort")
+        name, _ = parse_sort(sort)
+        value, last_id = payload["k"]
+        return [_decode_value(name, value), int(last_id)]
+    except InvalidCursor:
+        raise
+    except Exception as e:
+        raise InvalidCursor(f"Malformed cursor: {e}")
+
+
+def keyset_page(query, sort: str, limit: int, cursor: Optional[str] = None):
+    """Order a select() by sort (then id), continue after cursor and fetch limit + 1 rows to detect a next page"""
+    name, descending = parse_sort(sort)
+    keys = (Car.id,) if name == "id" else (SORT_COLUMNS[name], Car.id)
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort)
+        after = (last_id,) if name == "id" else (value, last_id)
+        left, right = (keys[0], after[0]) if len(keys) == 1 else (tuple_(*keys), tuple_(*after))
+        query = query.where(left < right if descending else left > right)
+    order = [k.desc() if descending else k.asc() for k in keys]
+    return query.order_by(*order).limit(limit + 1)
+
+
+def split_page(rows: List, sort: str, limit: int) -> Tuple[List, Optional[str]]:
+    """(rows of this page, cursor of the next page or None on the last page)"""
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(sort, rows[-1])
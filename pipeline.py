@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+"""
+Fetch / parse / store crawl pipeline
+Fetch threads own the drivers and only hand page HTML to a bounded parse
+queue; parse workers archive and extract cards and hand them to the
+process-wide background DB writer (db_writer.py), which stores them in
+batches. Full queues block the stage before them, so memory stays bounded
+and a slow database slows fetching instead of piling up pages.
+"""
+
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from config_manager import Config
+from db_writer import DbWriter
+from html_archive import archive_page
+from search_cards import parse_result_page
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+_active_pipelines = set()
+_active_lock = threading.Lock()
+
+
+class _TrackedQueue(queue.Queue):
+    """Bounded queue that remembers its high-water mark and time producers spent blocked"""
+
+    def __init__(self, maxsize: int):
+        super().__init__(maxsize)
+        self.max_depth = 0
+        self.blocked_seconds = 0.0
+
+    def put_tracked(self, item):
+        start = time.monotonic()
+        self.put(item)
+        waited = time.monotonic() - start
+        with self.mutex:
+            self.blocked_seconds += waited
+            self.max_depth = max(self.max_depth, self._qsize())
+        return waited
+
+    def stats(self) -> Dict:
+        return {"depth": self.qsize(), "max_depth": self.max_depth, "capacity": self.maxsize,
+                "producer_blocked_seconds": round(self.blocked_seconds, 3)}
+
+
+class CrawlPipeline:
+    """Three-stage pipeline; use as a context manager or call start()/close()"""
+
+    def __init__(self, parse_fn: Callable[[str], List[Dict]] = parse_result_page,
+                 writer: Optional[DbWriter] = None, parse_workers: Optional[int] = None,
+                 queue_size: Optional[int] = None, use_processes: Optional[bool] = None,
+                 collect: bool = True):
+        self.parse_fn = parse_fn
+        self.writer = writer
+        self.parse_workers = parse_workers or Config.PIPELINE_PARSE_WORKERS
+        self.use_processes = Config.PIPELINE_PARSE_PROCESSES if use_processes is None else use_processes
+        self.collect = collect
+        queue_size = queue_size or Config.PIPELINE_QUEUE_SIZE
+
+        self.parse_queue = _TrackedQueue(queue_size)
+        self.cars: List[Dict] = []
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+        self._executor = None
+        self._closed = False
+        self.stats = {
+            "fetch": {"pages": 0},
+            "parse": {"workers": self.parse_workers, "processes": self.use_processes, "pages": 0,
+                      "cars": 0, "errors": 0, "busy_seconds": 0.0},
+            "store": {"cars": 0, "blocked_seconds": 0.0},
+        }
+
+    def start(self) -> "CrawlPipeline":
+        if self.use_processes:
+            self._executor = ProcessPoolExecutor(max_workers=self.parse_workers)
+        for i in range(self.parse_workers):
+            self._spawn(self._parse_loop, f"pipeline-parse-{i}")
+        with _active_lock:
+            _active_pipelines.add(self)
+        return self
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def submit_page(self, url: str, html: str, via: str = "driver") -> float:
+        """Fetch stage hand-off; blocks while the parse queue is full and returns the seconds blocked"""
+        with self._lock:
+            self.stats["fetch"]["pages"] += 1
+        return self.parse_queue.put_tracked((url, html, via))
+
+    def store(self, cars: List[Dict]):
+        """Hand extracted cars to the DB writer; blocks while its queue is full"""
+        if self.writer is None or not cars:
+            return
+        waited = self.writer.submit(cars)
+        with self._lock:
+            self.stats["store"]["cars"] += len(cars)
+            self.stats["store"]["blocked_seconds"] += waited
+
+    def _parse_loop(self):
+        while True:
+            item = self.parse_queue.get()
+            if item is _STOP:
+                return
+            url, html, via = item
+            start = time.monotonic()
+            try:
+                archive_page(url, html, via=via)
+                if self._executor is not None:
+                    cars = self._executor.submit(self.parse_fn, html).result()
+                else:
+                    cars = self.parse_fn(html)
+            except Exception as e:
+                logger.error(f"Parse stage error for {url}: {e}")
+                with self._lock:
+                    self.stats["parse"]["errors"] += 1
+                continue
+            with self._lock:
+                parse = self.stats["parse"]
+                parse["pages"] += 1
+                parse["cars"] += len(cars)
+                parse["busy_seconds"] += time.monotonic() - start
+                if self.collect:
+                    self.cars.extend(cars)
+            self.store(cars)
+
+    def get_stats(self) -> Dict:
+        """Per-stage counters plus current and peak queue depths"""
+        with self._lock:
+            stats = {stage: dict(values) for stage, values in self.stats.items()}
+        stats["parse"]["busy_seconds"] = round(stats["parse"]["busy_seconds"], 3)
+        stats["store"]["blocked_seconds"] = round(stats["store"]["blocked_seconds"], 3)
+        stats["queues"] = {"parse": self.parse_queue.stats()}
+        if self.writer is not None:
+            stats["writer"] = self.writer.get_stats()
+        return stats
+
+    def close(self) -> Dict:
+        """Drain the parse stage, wait for the writer to store its cars and return the final stats"""
+        if self._closed:
+            return self.get_stats()
+        self._closed = True
+        for _ in self._threads:
+            self.parse_queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+        if self.writer is not None:
+            self.writer.flush()
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        with _active_lock:
+            _active_pipelines.discard(self)
+        stats = self.get_stats()
+        logger.info(f"Pipeline finished: {stats}")
+        return stats
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+def get_pipeline_stats() -> List[Dict]:
+    """Stats of every pipeline currently running in this process"""
+    with _active_lock:
+        pipelines = list(_active_pipelines)
+    return [p.get_stats() for p in pipelines]
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Per-host token bucket rate limiting
+One bucket per host is shared by every worker thread, so the politeness
+budget holds globally regardless of how many workers are running
+"""
+
+import logging
+import threading
+import time
+from typing import Dict, Optional
+from urllib.parse import urlsplit
+
+from config_manager import Config
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Thread-safe token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+        self.waited_total = 0.0
+        self.acquired = 0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> float:
+        """Take one token, sleeping if the bucket is empty; returns seconds waited"""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            # Reserve the token now (balance may go negative) so concurrent
+            # callers queue up behind each other instead of all waking at once
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            self.acquired += 1
+            self.waited_total += wait
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def set_rate(self, rate: float, capacity: Optional[float] = None):
+        """Change the refill rate (and optionally burst size) in place"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate
+            if capacity is not None:
+                self.capacity = capacity
+                self.tokens = min(self.tokens, capacity)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            return {
+                "rate": round(self.rate, 3),
+                "capacity": self.capacity,
+                "acquired": self.acquired,
+                "waited_seconds": round(self.waited_total, 2),
+            }
+
+
+class HostRateLimiter:
+    """Registry of token buckets keyed by host"""
+
+    def __init__(self, rate: Optional[float] = None, burst: Optional[float] = None):
+        self.rate = rate or Config.HOST_RATE_PER_SEC
+        self.burst = burst or Config.HOST_BURST
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            bucket = self._buckets.get(host)
+            if bucket is None:
+                bucket = TokenBucket(self.rate, self.burst)
+                self._buckets[host] = bucket
+            return bucket
+
+    def acquire(self, url: str) -> float:
+        """Block until a request to the URL's host is allowed"""
+        return self.bucket(urlsplit(url).netloc.lower()).acquire()
+
+    def set_rate(self, rate: float):
+        """Apply a new request rate to every host"""
+        with self._lock:
+            self.rate = rate
+            buckets = list(self._buckets.values())
+        for bucket in buckets:
+            bucket.set_rate(rate)
+
+    def get_stats(self) -> Dict:
+        with self._lock:
+            buckets = dict(self._buckets)
+        return {host: bucket.get_stats() for host, bucket in buckets.items()}
+
+
+_limiter: Optional[HostRateLimiter] = None
+_limiter_lock = threading.Lock()
+
+
+def get_host_limiter() -> HostRateLimiter:
+    """Process-wide limiter shared by all fetchers"""
+    global _limiter
+    with _limiter_lock:
+        if _limiter is None:
+            _limiter = HostRateLimiter()
+        return _limiter
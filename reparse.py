@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Offline re-parse of saved listing HTML
+Replays a directory, a tarball or the raw-HTML archive through the
+scraper.py extractors on every core and bulk-writes the results, so a
+parser fix can be applied to past crawls without touching the site
+
+Usage:
+  python reparse.py archive [--since HOURS]
+  python reparse.py /path/to/pages/ | pages.tar.gz [--workers N] [--batch-size N] [--dry-run]
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import re
+import sys
+import tarfile
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config_manager import Config
+from search_urls import listing_url
+
+logger = logging.getLogger(__name__)
+
+HTML_SUFFIXES = (".html", ".htm", ".html.gz", ".htm.gz")
+CANONICAL_RE = re.compile(
+    r'<link[^>]+rel=["\']canonical["\'][^>]*href=["\']([^"\']+)["\']'
+    r'|<meta[^>]+property=["\']og:url["\'][^>]*content=["\']([^"\']+)["\']',
+    re.IGNORECASE,
+)
+
+
+def page_url(name: str, html: str) -> Optional[str]:
+    """Listing URL for a saved page: canonical/og:url tag, else a numeric file name as the listing id"""
+    match = CANONICAL_RE.search(html, 0, 200_000)
+    if match:
+        return (match.group(1) or match.group(2)).replace("&amp;", "&")
+    stem = os.path.basename(name).split(".", 1)[0]
+    return listing_url(stem) if stem.isdigit() else None
+
+
+def _decode(name: str, data: bytes) -> str:
+    if name.endswith(".gz"):
+        data = gzip.decompress(data)
+    return data.decode("utf-8", errors="replace")
+
+
+def iter_directory(path: str) -> Iterator[Tuple[str, str]]:
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if name.lower().endswith(HTML_SUFFIXES):
+                full = os.path.join(root, name)
+                with open(full, "rb") as f:
+                    yield full, _decode(name, f.read())
+
+
+def iter_tarball(path: str) -> Iterator[Tuple[str, str]]:
+    with tarfile.open(path, "r:*") as tar:
+        for member in tar:
+            if member.isfile() and member.name.lower().endswith(HTML_SUFFIXES):
+                f = tar.extractfile(member)
+                if f is not None:
+                    yield member.name, _decode(member.name, f.read())
+
+
+def iter_archive(directory: Optional[str] = None, since_hours: Optional[float] = None) -> Iterator[Tuple[str, str]]:
+    """Newest archived body of every listing URL (search pages are skipped)"""
+    from html_archive import HtmlArchive
+    from scraper import extract_mobile_listing_id
+
+    since = time.time() - since_hours * 3600 if since_hours else None
+    for url, _, html in HtmlArchive(directory).iter_latest(since):
+        if extract_mobile_listing_id(url):
+            yield url, html
+
+
+def iter_pages(source: str, since_hours: Optional[float] = None) -> Iterator[Tuple[str, str]]:
+    """(url, html) pairs from a directory, a tarball or the archive"""
+    if source == "archive":
+        yield from iter_archive(since_hours=since_hours)
+        return
+    if os.path.isdir(source) and os.path.exists(os.path.join(source, "index.db")):
+        yield from iter_archive(source, since_hours)
+        return
+    pages = iter_directory(source) if os.path.isdir(source) else iter_tarball(source)
+    for name, html in pages:
+        url = page_url(name, html)
+        if url:
+            yield url, html
+        else:
+            logger.warning(f"No listing URL for {name}, skipped")
+
+
+def parse_batch(batch: List[Tuple[str, str]]) -> Tuple[List[Dict], int, float]:
+    """Worker: run the scraper.py extractors over a batch; returns (records, failures, cpu seconds)"""
+    from scraper import parse_listing_html
+
+    start = time.process_time()
+    records, failures = [], 0
+    for url, html in batch:
+        try:
+            records.append(parse_listing_html(html, url))
+        except Exception as e:
+            logger.error(f"Re-parse failed for {url}: {e}")
+            failures += 1
+    return records, failures, time.process_time() - start
+
+
+def reparse(source: str, workers: Optional[int] = None, batch_size: int = 200,
+            chunk_size: int = 25, write: bool = True, since_hours: Optional[float] = None) -> Dict:
+    """
+    Re-parse every page from `source` in a process pool and bulk-write the records.
+    Returns counts plus wall-clock and per-core throughput.
+    """
+    if write:
+        from db_operations import save_cars_to_database
+
+    workers = workers or os.cpu_count() or 1
+    stats = {"pages": 0, "parsed": 0, "parse_failed": 0, "inserted": 0, "updated": 0,
+             "unchanged": 0, "write_failed": 0, "cpu_seconds": 0.0}
+    pending_records: List[Dict] = []
+    start = time.monotonic()
+
+    def flush():
+        if write and pending_records:
+            counts = save_cars_to_database(pending_records)
+            for key in ("inserted", "updated", "unchanged"):
+                stats[key] += counts[key]
+            stats["write_failed"] += counts["failed"]
+        pending_records.clear()
+
+    def collect(done):
+        for future in done:
+            records, failures, cpu = future.result()
+            stats["parsed"] += len(records)
+            stats["parse_failed"] += failures
+            stats["cpu_seconds"] += cpu
+            pending_records.extend(records)
+            if len(pending_records) >= batch_size:
+                flush()
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        chunk: List[Tuple[str, str]] = []
+        for item in iter_pages(source, since_hours):
+            stats["pages"] += 1
+            chunk.append(item)
+            if len(chunk) < chunk_size:
+                continue
+            in_flight.add(pool.submit(parse_batch, chunk))
+            chunk = []
+            # Bound memory: never hold more than a few chunks per worker in flight
+            if len(in_flight) >= workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        if chunk:
+            in_flight.add(pool.submit(parse_batch, chunk))
+        collect(wait(in_flight).done)
+    flush()
+
+    elapsed = time.monotonic() - start
+    stats["workers"] = workers
+    stats["elapsed"] = round(elapsed, 2)
+    stats["cpu_seconds"] = round(stats["cpu_seconds"], 2)
+    stats["pages_per_sec"] = round(stats["pages"] / elapsed, 1) if elapsed else 0.0
+    stats["pages_per_sec_per_core"] = round(stats["pages"] / stats["cpu_seconds"], 1) if stats["cpu_seconds"] else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-parse saved listing HTML offline")
+    parser.add_argument("source", help="directory of .html files, a tarball, an archive directory, or 'archive'")
+    parser.add_argument("--workers", type=int, default=None, help="parser processes (default: all cores)")
+    parser.add_argument("--batch-size", type=int, default=200, help="records per database transaction")
+    parser.add_argument("--since", type=float, default=None, help="archive only: pages fetched in the last N hours")
+    parser.add_argument("--dry-run", action="store_true", help="parse only, do not write to the database")
+    args = parser.parse_args(argv)
+
+    stats = reparse(args.source, workers=args.workers, batch_size=args.batch_size,
+                    write=not args.dry_run, since_hours=args.since)
+    logger.info(f"Re-parse finished: {stats}")
+    logger.info(f"{stats['pages_per_sec']} pages/s wall, {stats['pages_per_sec_per_core']} pages/s per core "
+                f"over {stats['workers']} workers")
+    return stats
+
+
+if __name__ == "__main__":
+    logging.basicConfig(
+        level=getattr(logging, Config.LOG_LEVEL),
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    )
+    main(sys.argv[1:])
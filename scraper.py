@@ -7,27 +7,50 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, WebDriverException
-from bs4 import BeautifulSoup
+from bs4 import Tag
 import time
 import csv
 import os
 import re
+import queue
 import logging
-from urllib.parse import urlsplit, parse_qs
-from datetime import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+from urllib.parse import urljoin, urlsplit, parse_qs
 from config import Config
+from html_parsing import make_soup
+from embedded_data import covers_listing, extract_embedded_fields
+from fetcher import DetailFetcher, RESULT_PAGE_MARKERS
+from search_urls import DEFAULT_SEARCH
+from search_cards import parse_total_pages
+from frontier import Frontier
+from driver_pool import get_driver_pool
+from adaptive_throttle import get_controller
+from resource_blocking import apply_blocking_profile, blocking_stats, enable_network_logging
+from page_waits import snapshot_results, wait_for_clickable, wait_for_page_transition, wait_stats
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Database imports
-try:
-    from db_operations import save_car_to_database
-    DB_ENABLED = True
-    logger.info("Database functionality enabled")
-except ImportError as e:
-    logger.warning(f"Database functionality disabled: {e}")
-    DB_ENABLED = False
+# Database operations are imported on first use, so the parsing helpers stay
+# usable offline (reparse.py) without connecting to the database at import
+_db_operations = None
+_db_lock = threading.Lock()
+
+def get_db_operations():
+    """db_operations module, or None when database support is unavailable"""
+    global _db_operations
+    with _db_lock:
+        if _db_operations is None:
+            try:
+                import db_operations
+                _db_operations = db_operations
+                logger.info("Database functionality enabled")
+            except ImportError as e:
+                logger.warning(f"Database functionality disabled: {e}")
+                _db_operations = False
+        return _db_operations or None
 
 def setup_headless_driver():
     """Setup Chrome driver for Linux headless operation"""
@@ -56,9 +79,12 @@ def setup_headless_driver():
     if Config.CHROME_BINARY_PATH:
         options.binary_location = Config.CHROME_BINARY_PATH
     
+    enable_network_logging(options)
+    
     try:
         # Try to use undetected-chromedriver without version specification
         driver = uc.Chrome(options=options, driver_executable_path=Config.CHROMEDRIVER_PATH)
+        apply_blocking_profile(driver)
         logger.info("Chrome driver initialized successfully")
         return driver
     except Exception as e:
@@ -98,8 +124,9 @@ def click_continue_if_enabled(driver, timeout=10):
             return False
 
         # Scroll to button and click
+        snapshot = snapshot_results(driver)
         driver.execute_script("arguments[0].scrollIntoView({block:'center'});", btn)
-        time.sleep(1)
+        wait_for_clickable(driver, btn)
         
         try:
             btn.click()
@@ -107,6 +134,8 @@ def click_continue_if_enabled(driver, timeout=10):
             driver.execute_script("arguments[0].click();", btn)
 
         logger.info("Continue button clicked")
+        # Return once the new result page is in place rather than after a fixed delay
+        wait_for_page_transition(driver, snapshot, timeout)
         return True
 
     except TimeoutException:
@@ -134,32 +163,62 @@ def get_total_pages(driver, timeout=10):
     
     return Config.MAX_PAGES  # Default fallback
 
+# Key feature testid suffix -> field name
+KEY_FEATURE_MAP = {
+    'mileage': 'mileage',
+    'power': 'power',
+    'fuel': 'fuel_type',
+    'transmission': 'transmission',
+    'firstRegistration': 'first_registration',
+    'numberOfPreviousOwners': 'previous_owners',
+    'bodyType': 'body_type',
+    'seats': 'number_of_seats',
+    'doorCount': 'door_count',
+    'cubicCapacity': 'cubic_capacity',
+    'driveType': 'drive_type',
+}
+
+def camel_to_snake(name):
+    s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
+    return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
+
+# Normalized spec table label (English or German) -> field name
+TECHNICAL_LABEL_MAP = {
+    'vehiclecondition': 'vehicle_condition',
+    'fahrzeugzustand': 'vehicle_condition',
+    'category': 'category',
+    'fahrzeugtyp': 'category',
+    'modelrange': 'model_range',
+    'modellreihe': 'model_range',
+    'trimline': 'trim_line',
+    'ausstattungslinie': 'trim_line',
+    'vehiclenumber': 'vehicle_number',
+    'fahrzeugnummer': 'vehicle_number',
+    'origin': 'origin',
+    'herkunft': 'origin',
+    'mileage': 'mileage',
+    'kilometer': 'mileage',
+    'cubiccapacity': 'cubic_capacity',
+    'hubraum': 'cubic_capacity',
+    'power': 'power',
+    'leistung': 'power',
+    'drivetype': 'drive_type',
+    'antriebsart': 'drive_type',
+    'fuel': 'fuel_type',
+    'kraftstoff': 'fuel_type',
+}
+
+def normalize_label(label):
+    return re.sub(r'[^a-z0-9]', '', label.lower())
+
 def scrape_car_details(soup):
     """Extract key features from listing page"""
     car_details = {}
     try:
-        key_map = {
-            'mileage': 'mileage',
-            'power': 'power',
-            'fuel': 'fuel_type',
-            'transmission': 'transmission',
-            'firstRegistration': 'first_registration',
-            'numberOfPreviousOwners': 'previous_owners',
-            'bodyType': 'body_type',
-            'seats': 'number_of_seats',
-            'doorCount': 'door_count',
-            'cubicCapacity': 'cubic_capacity',
-            'driveType': 'drive_type',
-        }
-
-        def camel_to_snake(name):
-            s1 = re.sub('(.)([A-Z][a-z]+)', r'\1_\2', name)
-            return re.sub('([a-z0-9])([A-Z])', r'\1_\2', s1).lower()
-
         for item in soup.select('[data-testid^="vip-key-features-list-item"]'):
             dtid = item.get('data-testid', '')
             suffix = dtid.split('vip-key-features-list-item-')[-1]
-            key = key_map.get(suffix, camel_to_snake(suffix))
+            key = KEY_FEATURE_MAP.get(suffix, camel_to_snake(suffix))
             val_div = item.find('div', class_='geJSa')
             if not val_div:
                 val_div = item.find('span')
@@ -176,34 +235,6 @@ def scrape_technical_data_from_element(soup):
     """Extract technical data from listing page"""
     car_details = {}
     try:
-        label_map = {
-            'vehiclecondition': 'vehicle_condition',
-            'fahrzeugzustand': 'vehicle_condition',
-            'category': 'category',
-            'fahrzeugtyp': 'category',
-            'modelrange': 'model_range',
-            'modellreihe': 'model_range',
-            'trimline': 'trim_line',
-            'ausstattungslinie': 'trim_line',
-            'vehiclenumber': 'vehicle_number',
-            'fahrzeugnummer': 'vehicle_number',
-            'origin': 'origin',
-            'herkunft': 'origin',
-            'mileage': 'mileage',
-            'kilometer': 'mileage',
-            'cubiccapacity': 'cubic_capacity',
-            'hubraum': 'cubic_capacity',
-            'power': 'power',
-            'leistung': 'power',
-            'drivetype': 'drive_type',
-            'antriebsart': 'drive_type',
-            'fuel': 'fuel_type',
-            'kraftstoff': 'fuel_type',
-        }
-
-        def normalize_label(label):
-            return re.sub(r'[^a-z0-9]', '', label.lower())
-
         # Extract technical data from dt/dd pairs
         dts = soup.find_all('dt')
         for dt_tag in dts:
@@ -211,7 +242,7 @@ def scrape_technical_data_from_element(soup):
             if dd_tag:
                 raw_key = dt_tag.get_text(strip=True)
                 norm_key = normalize_label(raw_key)
-                key = label_map.get(norm_key, norm_key)
+                key = TECHNICAL_LABEL_MAP.get(norm_key, norm_key)
                 value = dd_tag.get_text(strip=True)
                 car_details[key] = value
 
@@ -299,9 +330,9 @@ def scrape_car_details_from_element(soup):
         return {}
 
 def extract_image_urls(html):
-    """Extract image URLs from HTML"""
+    """Extract image URLs from HTML or an already parsed element"""
     try:
-        soup = BeautifulSoup(html, "html.parser")
+        soup = html if hasattr(html, "find_all") else make_soup(html)
         urls = set()
         for img in soup.find_all("img"):
             src = img.get("src")
@@ -318,15 +349,19 @@ def extract_image_urls(html):
         logger.error(f"Error extracting images: {e}")
         return []
 
+_csv_lock = threading.Lock()
+
 def save_car_data(car_details, output_file):
     """Save car data to CSV and database"""
     try:
-        # Save to CSV
-        write_car_details_to_csv(car_details, output_file)
+        # Save to CSV (serialized: detail workers may share the output file)
+        with _csv_lock:
+            write_car_details_to_csv(car_details, output_file)
         
         # Save to database if enabled
-        if DB_ENABLED:
-            save_car_to_database(car_details.copy())
+        db = get_db_operations()
+        if db:
+            db.save_car_to_database(car_details.copy())
     except Exception as e:
         logger.error(f"Error saving car data: {e}")
 
@@ -407,7 +442,493 @@ def read_links_from_csv(file_path, col_no=0):
     
     return links
 
-def main():
+def _has_class(tag, value):
+    """BeautifulSoup class matching: one class of the tag, or the whole class string"""
+    classes = tag.get('class') or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return value in classes or ' '.join(classes) == value
+
+def _text(tag):
+    return tag.get_text(strip=True) if tag is not None else 'Not found'
+
+def extract_listing_fields(soup):
+    """
+    Single-pass extraction of a detail page
+    Walks the tree once and returns (fields, image_urls), where fields equals
+    {**scrape_car_details_from_element, **scrape_car_details, **scrape_technical_data_from_element}
+    and image_urls equals extract_image_urls on the gallery container
+    """
+    first = {}            # first match in document order, as soup.find would return
+    seller = monthly = gallery = None
+    key_items = []        # [testid, first div.geJSa, first span] per key feature item
+    pending_dts = []      # dts waiting for the next dd in document order
+    spec_pairs = []
+    features = []
+    image_urls = set()
+
+    stack = [(child, ()) for child in reversed(soup.contents) if isinstance(child, Tag)]
+    while stack:
+        tag, scopes = stack.pop()
+        name = tag.name
+        attrs = tag.attrs
+
+        # Lookups scoped to an enclosing block (block.find(...) in the multi-pass extractors)
+        for scope in scopes:
+            kind, state = scope
+            if kind == 'gallery':
+                if name == 'img':
+                    src = attrs.get('src')
+                    if src and 'mobile.de' in src:
+                        image_urls.add(src)
+                    srcset = attrs.get('srcset')
+                    if srcset:
+                        for part in srcset.split(','):
+                            url = part.strip().split()[0]
+                            if 'mobile.de' in url:
+                                image_urls.add(url)
+            elif kind == 'key':
+                if name == 'div' and state[1] is None and _has_class(tag, 'geJSa'):
+                    state[1] = tag
+                elif name == 'span' and state[2] is None:
+                    state[2] = tag
+            elif kind == 'seller':
+                if name == 'div' and 'type' not in state and _has_class(tag, 'QTTRi'):
+                    state['type'] = tag
+                elif name == 'div' and 'location' not in state and _has_class(tag, 'olCKS'):
+                    state['location'] = tag
+                elif name == 'span' and 'phone' not in state and attrs.get('aria-live') == 'polite':
+                    state['phone'] = tag
+            elif kind == 'monthly':
+                if name == 'a' and 'link' not in state and 'href' in attrs:
+                    state['link'] = tag
+
+        child_scopes = scopes
+        testid = attrs.get('data-testid')
+        if testid:
+            if testid == 'vip-price-label':
+                first.setdefault('price', tag)
+            elif testid == 'vip-financing-monthly-rate' and monthly is None:
+                monthly = {'block': tag}
+                child_scopes += (('monthly', monthly),)
+            elif testid == 'seller-title-address' and seller is None:
+                seller = {}
+                child_scopes += (('seller', seller),)
+            if testid.startswith('vip-key-features-list-item'):
+                item = [testid, None, None]
+                key_items.append(item)
+                child_scopes += (('key', item),)
+
+        if name == 'dt':
+            pending_dts.append(tag)
+        elif name == 'dd':
+            spec_pairs.extend((dt, tag) for dt in pending_dts)
+            pending_dts = []
+        elif name == 'li':
+            if _has_class(tag, 'FtSYW'):
+                feature_name = tag.get_text(strip=True)
+                if feature_name:
+                    features.append(feature_name)
+        elif name == 'h2':
+            if 'title' not in first and _has_class(tag, 'dNpqi'):
+                first['title'] = tag
+        elif name == 'span':
+            if 'dealer_rating' not in first and _has_class(tag, 'qHfAA'):
+                first['dealer_rating'] = tag
+        elif name == 'a':
+            if 'dealer' not in first and _has_class(tag, 'FWtU1 rqVIk lZcLh'):
+                first['dealer'] = tag
+            if 'monthly_rate' not in first and _has_class(tag, 'cCGm3'):
+                first['monthly_rate'] = tag
+        elif name == 'div' and 'class' in attrs:
+            if gallery is None and _has_class(tag, 'mRJ5K'):
+                gallery = tag
+                child_scopes += (('gallery', None),)
+            for key, css in (('additional_info', 'GOIOV fqe3L EevEz'), ('price_fallback', 'HBWcC'),
+                             ('rating', '_u77E'), ('negotiable', 'HaBLt ZD2EM')):
+                if key not in first and _has_class(tag, css):
+                    first[key] = tag
+
+        children = [child for child in tag.contents if isinstance(child, Tag)]
+        stack.extend((child, child_scopes) for child in reversed(children))
+
+    # scrape_car_details_from_element
+    fields = {
+        'title': _text(first.get('title')),
+        'additional_info': _text(first.get('additional_info')),
+        'price': _text(first.get('price', first.get('price_fallback'))),
+        'dealer_rating': _text(first.get('dealer_rating')),
+        'dealer': _text(first.get('dealer')),
+        'rating': _text(first.get('rating')),
+        'negotiable': _text(first.get('negotiable')),
+    }
+    if monthly is not None:
+        rate_link = monthly.get('link')
+        if rate_link is not None:
+            fields['monthly_rate'] = rate_link.get_text(strip=True)
+            fields['monthly_rate_href'] = rate_link['href']
+        else:
+            fields['monthly_rate'] = monthly['block'].get_text(strip=True)
+    elif 'monthly_rate' in first:
+        fields['monthly_rate'] = first['monthly_rate'].get_text(strip=True)
+        fields['monthly_rate_href'] = first['monthly_rate'].get('href', 'Not found')
+    if seller is not None:
+        fields['seller_type'] = _text(seller.get('type'))
+        fields['location'] = _text(seller.get('location'))
+        fields['phone'] = _text(seller.get('phone'))
+
+    # scrape_car_details
+    for testid, val_div, span in key_items:
+        suffix = testid.split('vip-key-features-list-item-')[-1]
+        value_tag = val_div or span
+        if value_tag:
+            fields[KEY_FEATURE_MAP.get(suffix, camel_to_snake(suffix))] = value_tag.get_text(strip=True)
+
+    # scrape_technical_data_from_element
+    for dt_tag, dd_tag in spec_pairs:
+        norm_key = normalize_label(dt_tag.get_text(strip=True))
+        fields[TECHNICAL_LABEL_MAP.get(norm_key, norm_key)] = dd_tag.get_text(strip=True)
+    if features:
+        fields['features'] = features
+
+    return fields, list(image_urls)
+
+# Which path served each parsed detail page
+embedded_stats = {"embedded_only": 0, "dom_fallback": 0, "dom_only": 0}
+_embedded_stats_lock = threading.Lock()  # detail workers parse concurrently
+
+def parse_listing_html(html, link):
+    """
+    Parse a fetched detail page into the combined car details dict
+    The DOM walk is skipped only when the embedded JSON fills every stored
+    field; otherwise it runs, DOM values win and embedded values only fill
+    fields the DOM did not find. The record is marked detail_page so the
+    database counts it as a detail fetch
+    """
+    embedded = {}
+    if Config.EMBEDDED_DATA_ENABLED:
+        embedded = extract_embedded_fields(html, extract_mobile_listing_id(link))
+
+    path = "embedded_only" if embedded and covers_listing(embedded) else "dom_fallback" if embedded else "dom_only"
+    with _embedded_stats_lock:
+        embedded_stats[path] += 1
+
+    if path == "embedded_only":
+        fields = dict(embedded)
+        image_urls = fields.pop('img_urls')
+    else:
+        soup = make_soup(html)
+        fields, image_urls = extract_listing_fields(soup)
+        embedded_images = embedded.pop('img_urls', [])
+        image_urls = image_urls or embedded_images
+        for key, value in embedded.items():
+            if fields.get(key) in (None, '', [], 'Not found'):
+                fields[key] = value
+    return {
+        "url": link,
+        'img_urls': image_urls,
+        **fields,
+        'detail_page': True
+    }
+
+def scrape_listing(fetcher, link, output_file, position=""):
+    """Fetch, parse and save a single listing; returns True on success"""
+    if not link or not link.strip():
+        return False
+
+    listing_id = extract_mobile_listing_id(link)
+    if not listing_id:
+        logger.warning(f"{position} Skipping (no id found) -> {link}")
+        return False
+
+    logger.info(f"{position} Processing -> id={listing_id}")
+
+    try:
+        fetched = fetcher.fetch(link)
+        if not fetched["html"]:
+            logger.warning(f"Could not fetch listing {listing_id} ({fetched['fallback_reason']})")
+            return False
+
+        combined_car_details = parse_listing_html(fetched["html"], link)
+
+        if combined_car_details:
+            save_car_data(combined_car_details, output_file)
+            logger.info(f"Successfully scraped listing {listing_id}")
+            return True
+        logger.warning(f"No details found for listing {listing_id}")
+    except Exception as e:
+        logger.error(f"Error processing {link}: {e}")
+    return False
+
+# Per-run counters for incremental recrawl
+incremental_stats = {"links_seen": 0, "skipped_fresh": 0, "queued": 0}
+
+def queue_links(frontier, links):
+    """
+    Queue links in the frontier, skipping listings whose DB record is newer
+    than RECRAWL_TTL_HOURS when incremental crawling is enabled
+    """
+    links = list(links)
+    to_fetch = links
+    db = get_db_operations() if Config.INCREMENTAL_CRAWL and links else None
+    if db:
+        fresh = db.get_fresh_listing_ids([extract_mobile_listing_id(link) for link in links], Config.RECRAWL_TTL_HOURS)
+        to_fetch = [link for link in links if extract_mobile_listing_id(link) not in fresh]
+    incremental_stats["links_seen"] += len(links)
+    incremental_stats["skipped_fresh"] += len(links) - len(to_fetch)
+    incremental_stats["queued"] += len(to_fetch)
+    frontier.add(to_fetch)
+    return len(to_fetch)
+
+def scrape_frontier(frontier, fetcher, output_file, worker_id, controller=None):
+    """Claim URLs from the frontier until it is drained, recording each outcome"""
+    processed = 0
+    while True:
+        # The adaptive controller decides how many workers may be active at once
+        with controller.slot() if controller else nullcontext():
+            link = frontier.claim_one(worker_id)
+            if link is None:
+                return processed
+            processed += 1
+            if scrape_listing(fetcher, link, output_file, f"[{worker_id} #{processed}]"):
+                frontier.mark_done(link)
+            else:
+                frontier.mark_failed(link, "fetch or parse failed")
+
+def scrape_details_concurrently(frontier, output_file, workers=None):
+    """
+    Scrape detail pages with N workers claiming URLs from the frontier.
+    Each worker owns its HTTP session and checks out a fallback driver from
+    the pool only when needed; all of them share the per-host rate limiter.
+    """
+    workers = workers or Config.DETAIL_WORKERS
+    logger.info(f"Scraping frontier {frontier.counts()} with {workers} workers")
+    pool = get_driver_pool()
+    controller = get_controller() if Config.ADAPTIVE_THROTTLE_ENABLED else None
+
+    def worker(n):
+        fetcher = DetailFetcher(driver_pool=pool)
+        worker_id = f"{os.getpid()}-{n}"
+        try:
+            scrape_frontier(frontier, fetcher, output_file, worker_id, controller)
+            return fetcher.get_stats()
+        finally:
+            fetcher.close()
+            frontier.close()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = [f.result() for f in [executor.submit(worker, n) for n in range(workers)]]
+
+    totals = {"http": 0, "driver": 0, "failed": 0, "total": 0, "fallback_reasons": {}}
+    for stats in results:
+        for key in ("http", "driver", "failed", "total"):
+            totals[key] += stats[key]
+        for reason, count in stats["fallback_reasons"].items():
+            totals["fallback_reasons"][reason] = totals["fallback_reasons"].get(reason, 0) + count
+    totals["http_hit_rate"] = round(totals["http"] / totals["total"], 3) if totals["total"] else 0.0
+    return totals
+
+def submit_search_form(driver):
+    """Fill and submit the quick-search form (Mercedes-Benz, specific model, etc.)"""
+    logger.info("Performing search...")
+    try:
+        # Select make (Mercedes-Benz)
+        make_dropdown = WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.ID, 'qs-select-make'))
+        )
+        mercedes_option = WebDriverWait(driver, 15).until(
+            EC.element_to_be_clickable((By.XPATH, "//option[@value='17200']"))
+        )
+        mercedes_option.click()
+
+        # Select model
+        model_dropdown = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, 'qs-select-model'))
+        )
+        model_option = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//option[@value='126']"))
+        )
+        model_option.click()
+
+        # Select mileage
+        mileage_dropdown = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.ID, 'qs-select-mileage-up-to'))
+        )
+        mileage_dropdown.click()
+        mileage_option = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//option[@value='50000']"))
+        )
+        mileage_option.click()
+
+        # Select purchase type
+        purchase_button = WebDriverWait(driver, 10).until(
+            EC.element_to_be_clickable((By.XPATH, "//button[@value='purchase']"))
+        )
+        purchase_button.click()
+
+        # Submit search
+        submit_button = WebDriverWait(driver, 20).until(
+            EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-testid="qs-submit-button"]'))
+        )
+        time.sleep(2)
+        submit_button.click()
+        logger.info("Search submitted")
+        return True
+
+    except Exception as e:
+        logger.error(f"Search setup failed: {e}")
+        return False
+
+def collect_links_by_clicking(driver, frontier):
+    """Walk result pages through the Continue button, queueing links in the frontier"""
+    seen = set()
+    page_count = 0
+    total_pages = get_total_pages(driver)
+    total_links = 0
+
+    logger.info(f"Starting pagination (max {total_pages} pages)...")
+    while page_count < total_pages:
+        page_count += 1
+        logger.info(f"Processing page {page_count}/{total_pages}")
+
+        try:
+            articles = WebDriverWait(driver, 10).until(
+                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article a[href]"))
+            )
+
+            href_links = []
+            for article in articles:
+                link = article.get_attribute("href")
+                if link and link not in seen:
+                    seen.add(link)
+                    href_links.append(link)
+
+            logger.info(f"Found {len(href_links)} new links on this page")
+
+            queue_links(frontier, href_links)
+            total_links += len(href_links)
+
+            logger.info(f"Total links collected: {total_links}")
+
+            if page_count >= total_pages:
+                break
+
+            if not click_continue_if_enabled(driver):
+                break
+
+        except Exception as e:
+            logger.error(f"Error on page {page_count}: {e}")
+            break
+    return total_links
+
+def parse_result_links(html, page_url):
+    """Absolute listing links from a result page, in page order"""
+    soup = make_soup(html)
+    links = []
+    for a in soup.select('article a[href]'):
+        link = urljoin(page_url, a['href'])
+        if link not in links:
+            links.append(link)
+    return links, soup
+
+def fetch_result_page(fetcher, query, page, retries=None):
+    """
+    Fetch and parse one result page with its own retry budget
+    Returns (links, soup), ([], soup) for a page that loads without listings
+    (past the last page: the end of the results, not retried) or None
+    """
+    retries = Config.SEARCH_PAGE_RETRIES if retries is None else retries
+    url = query.url(page)
+    for attempt in range(1, retries + 2):
+        fetched = fetcher.fetch(url)
+        if fetched["html"]:
+            links, soup = parse_result_links(fetched["html"], url)
+            if not links:
+                logger.info(f"Result page {page}: no listings, end of results")
+            return links, soup
+        if fetched["fallback_reason"] == "missing_content":
+            logger.info(f"Result page {page}: no listings, end of results")
+            return [], None
+        logger.warning(f"Result page {page} attempt {attempt} failed ({fetched['fallback_reason']})")
+    return None
+
+def collect_links_by_url(query, frontier, driver=None, start_page=1, max_pages=None, workers=None):
+    """
+    Collect listing links by fetching result pages directly by URL.
+    Page start_page is fetched first to learn the page count; the rest are
+    fetched concurrently and retried individually, so one bad page no longer
+    ends the run and a run can resume from any page.
+    """
+    max_pages = max_pages or Config.MAX_PAGES
+    workers = workers or Config.SEARCH_PAGE_WORKERS
+
+    first_fetcher = DetailFetcher(driver=driver, content_markers=RESULT_PAGE_MARKERS)
+    first = fetch_result_page(first_fetcher, query, start_page)
+    first_fetcher.close()
+    if not first:
+        logger.error(f"Could not fetch result page {start_page} for {query}")
+        return 0
+
+    links, soup = first
+    if not links:
+        return 0
+    # Without a page count label, fetch up to max_pages and stop at the first empty page
+    total_pages = parse_total_pages(soup)
+    last_page = start_page + max_pages - 1
+    if total_pages:
+        last_page = min(total_pages, last_page)
+    logger.info(f"URL pagination: pages {start_page}-{last_page} of {total_pages or 'unknown'} "
+                f"with {workers} workers")
+
+    pages = {start_page: links}
+    failed = []
+    remaining = queue.Queue()
+    for page in range(start_page + 1, last_page + 1):
+        remaining.put(page)
+    pool = get_driver_pool()
+
+    def worker():
+        fetcher = DetailFetcher(driver_pool=pool, content_markers=RESULT_PAGE_MARKERS)
+        try:
+            while True:
+                try:
+                    page = remaining.get_nowait()
+                except queue.Empty:
+                    break
+                result = fetch_result_page(fetcher, query, page)
+                if result is None:
+                    failed.append(page)
+                elif result[0]:
+                    pages[page] = result[0]
+                else:
+                    # End of results: the pages still queued all come after this one
+                    try:
+                        while True:
+                            remaining.get_nowait()
+                    except queue.Empty:
+                        break
+        finally:
+            fetcher.close()
+
+    if last_page > start_page:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for future in [executor.submit(worker) for _ in range(min(workers, last_page - start_page))]:
+                future.result()
+
+    seen = set()
+    total_links = 0
+    for page in sorted(pages):
+        new_links = [link for link in pages[page] if link not in seen]
+        seen.update(new_links)
+        queue_links(frontier, new_links)
+        total_links += len(new_links)
+
+    if failed:
+        logger.warning(f"Result pages failed after retries: {sorted(failed)} (resume with start_page={min(failed)})")
+    logger.info(f"Total links collected: {total_links} from {len(pages)} pages")
+    return total_links
+
+def main(start_page=1):
     """Main scraping function"""
     logger.info("Starting Mobile.de scraper")
     
@@ -424,6 +945,8 @@ def main():
         # Check for access denied
         if "Access denied" in driver.title or "Zugriff verweigert" in driver.title:
             logger.error("❌ Access denied by mobile.de - anti-bot protection active")
+            if Config.ADAPTIVE_THROTTLE_ENABLED:
+                get_controller().record("block")
             return
         
         logger.info("Checking for consent...")
@@ -431,165 +954,43 @@ def main():
         
         time.sleep(5)
         
-        # Perform search (Mercedes-Benz, specific model, etc.)
-        logger.info("Performing search...")
-        try:
-            # Select make (Mercedes-Benz)
-            make_dropdown = WebDriverWait(driver, 15).until(
-                EC.element_to_be_clickable((By.ID, 'qs-select-make'))
-            )
-            mercedes_option = WebDriverWait(driver, 15).until(
-                EC.element_to_be_clickable((By.XPATH, "//option[@value='17200']"))
-            )
-            mercedes_option.click()
-
-            # Select model
-            model_dropdown = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, 'qs-select-model'))
-            )
-            model_option = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//option[@value='126']"))
-            )
-            model_option.click()
-
-            # Select mileage
-            mileage_dropdown = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.ID, 'qs-select-mileage-up-to'))
-            )
-            mileage_dropdown.click()
-            mileage_option = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//option[@value='50000']"))
-            )
-            mileage_option.click()
-
-            # Select purchase type
-            purchase_button = WebDriverWait(driver, 10).until(
-                EC.element_to_be_clickable((By.XPATH, "//button[@value='purchase']"))
-            )
-            purchase_button.click()
-
-            # Submit search
-            submit_button = WebDriverWait(driver, 20).until(
-                EC.element_to_be_clickable((By.CSS_SELECTOR, 'button[data-testid="qs-submit-button"]'))
-            )
-            time.sleep(2)
-            submit_button.click()
-            logger.info("Search submitted")
-
-        except Exception as e:
-            logger.error(f"Search setup failed: {e}")
-            return
-
-        # Collect article links
-        time1 = datetime.now().strftime("%Y-%m-%d_%H-%M-%S")
-        links_file = f'article_links_{time1}.csv'
-        
-        with open(links_file, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(['Link'])
-
-        seen = set()
-        page_count = 0
-        total_pages = get_total_pages(driver)
-        total_links = 0
-
-        logger.info(f"Starting pagination (max {total_pages} pages)...")
-        while page_count < total_pages:
-            page_count += 1
-            logger.info(f"Processing page {page_count}/{total_pages}")
-
-            try:
-                articles = WebDriverWait(driver, 10).until(
-                    EC.presence_of_all_elements_located((By.CSS_SELECTOR, "article a[href]"))
-                )
-                
-                href_links = []
-                for article in articles:
-                    link = article.get_attribute("href")
-                    if link and link not in seen:
-                        seen.add(link)
-                        href_links.append(link)
-
-                logger.info(f"Found {len(href_links)} new links on this page")
-
-                if href_links:
-                    with open(links_file, mode='a', newline='', encoding='utf-8') as file:
-                        writer = csv.writer(file)
-                        for link in href_links:
-                            writer.writerow([link])
-                            total_links += 1
-
-                logger.info(f"Total links collected: {total_links}")
-
-                if page_count >= total_pages:
-                    break
-
-                if not click_continue_if_enabled(driver):
-                    break
-
-                time.sleep(Config.SCRAPER_DELAY)
-
-            except Exception as e:
-                logger.error(f"Error on page {page_count}: {e}")
-                break
-
-        logger.info(f"Link collection complete. Saved to '{links_file}'")
+        # Collect article links into the persistent frontier
+        frontier = Frontier()
+        if frontier.has_unfinished() and start_page == 1:
+            logger.info(f"Resuming unfinished crawl from frontier: {frontier.counts()}")
+        else:
+            total_links = 0
+            if Config.URL_PAGINATION:
+                # Result pages are addressed by URL: fetched directly, in parallel, resumable
+                total_links = collect_links_by_url(DEFAULT_SEARCH, frontier, driver, start_page)
+
+            if not total_links:
+                if not submit_search_form(driver):
+                    return
+                collect_links_by_clicking(driver, frontier)
+
+            logger.info(f"Link collection complete. Frontier: {frontier.counts()}")
+            if Config.INCREMENTAL_CRAWL:
+                logger.info(f"Incremental crawl: {incremental_stats['skipped_fresh']} of "
+                            f"{incremental_stats['links_seen']} detail fetches avoided "
+                            f"(fresher than {Config.RECRAWL_TTL_HOURS}h)")
+            logger.info(f"Page wait timings: {wait_stats.get_stats()}")
 
         # Scrape individual listings
         logger.info("Starting individual listing scraping...")
-        links = read_links_from_csv(links_file, 0)
         output_file = 'car_details_output.csv'
+        fetcher = DetailFetcher(driver=driver)
 
-        for i, link in enumerate(links, start=1):
-            if not link or not link.strip():
-                continue
-
-            listing_id = extract_mobile_listing_id(link)
-            if not listing_id:
-                logger.warning(f"[{i}/{len(links)}] Skipping (no id found) -> {link}")
-                continue
-
-            logger.info(f"[{i}/{len(links)}] Processing -> id={listing_id}")
-
-            try:
-                driver.get(link)
-                time.sleep(Config.SCRAPER_DELAY)
-
-                # Extract images
-                try:
-                    container = driver.find_element(By.CSS_SELECTOR, "div.mRJ5K")
-                    html = container.get_attribute("innerHTML")
-                    image_urls = extract_image_urls(html)
-                except Exception:
-                    image_urls = []
-
-                # Get page source and parse
-                page_source = driver.page_source
-                soup = BeautifulSoup(page_source, 'html.parser')
-
-                # Extract all details
-                technical_data = scrape_technical_data_from_element(soup)
-                car_details = scrape_car_details(soup)
-                car_details_from_element = scrape_car_details_from_element(soup)
-
-                # Combine all data
-                combined_car_details = {
-                    "url": link,
-                    'img_urls': image_urls,
-                    **car_details_from_element,
-                    **car_details,
-                    **technical_data
-                }
-
-                if combined_car_details:
-                    save_car_data(combined_car_details, output_file)
-                    logger.info(f"Successfully scraped listing {listing_id}")
-                else:
-                    logger.warning(f"No details found for listing {listing_id}")
-
-            except Exception as e:
-                logger.error(f"Error processing {link}: {e}")
+        if Config.DETAIL_WORKERS > 1:
+            fetch_stats = scrape_details_concurrently(frontier, output_file, Config.DETAIL_WORKERS)
+        else:
+            scrape_frontier(frontier, fetcher, output_file, f"{os.getpid()}-0")
+            fetch_stats = fetcher.get_stats()
 
+        fetcher.close()
+        logger.info(f"Fetch stats: {fetch_stats}")
+        logger.info(f"Resource blocking: {blocking_stats.get_stats()}")
+        logger.info(f"Frontier: {frontier.counts()}")
         logger.info("Data extraction completed!")
 
     except Exception as e:
@@ -602,4 +1003,6 @@ def main():
             pass
 
 if __name__ == "__main__":
-    main()
+    import sys
+    # Optional first argument: result page to restart link collection from
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1)
@@ -7,26 +7,37 @@ Consolidates streaming and batch scraping functionality
 import asyncio
 import logging
 import os
-import re
+import queue
+import threading
 import time
 from datetime import datetime
 from typing import Dict, List, Optional, AsyncGenerator
 
-import undetected_chromedriver as uc
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException
-from bs4 import BeautifulSoup
 
 from config_manager import Config
+from driver_pool import create_chrome_driver, get_driver_pool
+from adaptive_throttle import get_controller
+from resource_blocking import blocking_stats, collect_page_report
+from search_urls import SearchQuery
+from html_archive import archive_page
+from search_cards import PAGINATION_STRAINER, card_extractor, parse_total_pages
+from pipeline import CrawlPipeline
+from db_writer import flush_db_writer, get_db_writer
+from fetcher import RESULT_PAGE_MARKERS
+from html_parsing import make_soup
+from page_waits import (
+    snapshot_results, wait_for_clickable, wait_for_document_ready, wait_for_page_transition, wait_stats
+)
 
 logger = logging.getLogger(__name__)
 
 # Try to enable database support
 try:
-    from db_operations import save_car_to_database
+    from db_operations import save_cars_to_database  # the DB writer stores through it
     DB_ENABLED = True
     logger.info("Database functionality enabled")
 except ImportError:
@@ -40,6 +51,8 @@ class MobileDeScraperConfig:
     PAGINATION_TIMEOUT = 10
     ELEMENT_TIMEOUT = 8
     PAGE_LOAD_TIMEOUT = 20
+    DRIVER_CHECKOUT_TIMEOUT = 120
+    DB_FLUSH_TIMEOUT = 60
 
 
 class MobileDeScraperUnified:
@@ -48,52 +61,32 @@ class MobileDeScraperUnified:
     def __init__(self):
         self.driver = None
         self.config = Config()
+        self.pages_scraped = 0
     
     def setup_driver(self) -> Optional[object]:
-        """Initialize optimized headless Chrome driver"""
-        logger.info("Initializing Chrome driver...")
-        
-        options = Options()
-        
-        if self.config.HEADLESS_MODE:
-            options.add_argument("--headless")
-        
-        # Production-ready options
-        options.add_argument("--no-sandbox")
-        options.add_argument("--disable-dev-shm-usage")
-        options.add_argument("--disable-extensions")
-        options.add_argument("--disable-gpu")
-        options.add_argument("--disable-web-security")
-        options.add_argument("--disable-blink-features=AutomationControlled")
-        options.add_argument("--window-size=1920,1080")
-        options.add_argument("--disable-logging")
-        options.add_argument("--disable-sync")
-        options.add_argument("--no-first-run")
-        options.add_argument("user-agent=Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36")
-        
-        if self.config.CHROME_BINARY_PATH:
-            options.binary_location = self.config.CHROME_BINARY_PATH
-        
-        try:
-            self.driver = uc.Chrome(
-                options=options,
-                driver_executable_path=self.config.CHROMEDRIVER_PATH or None,
-                version_main=144
-            )
-            logger.info("Chrome driver initialized")
-            return self.driver
-        except Exception as e:
-            logger.error(f"Failed to init driver: {e}")
-            return None
+        """Check out a warm Chrome driver from the shared pool"""
+        logger.info("Acquiring Chrome driver...")
+        if self.config.DRIVER_POOL_ENABLED:
+            self.driver = get_driver_pool().checkout(timeout=MobileDeScraperConfig.DRIVER_CHECKOUT_TIMEOUT)
+        else:
+            self.driver = create_chrome_driver()
+        self.pages_scraped = 0
+        return self.driver
     
-    def close_driver(self):
-        """Safely close driver"""
+    def close_driver(self, healthy: bool = True):
+        """Return driver to the pool (or quit it when pooling is disabled); flushes pending DB writes"""
+        if DB_ENABLED and not flush_db_writer(timeout=MobileDeScraperConfig.DB_FLUSH_TIMEOUT):
+            logger.warning("DB writer still busy after flush timeout")
         if self.driver:
-            try:
-                self.driver.quit()
-                logger.info("Driver closed")
-            except Exception as e:
-                logger.warning(f"Error closing driver: {e}")
+            if self.config.DRIVER_POOL_ENABLED:
+                get_driver_pool().checkin(self.driver, pages=self.pages_scraped, healthy=healthy)
+                logger.info("Driver returned to pool")
+            else:
+                try:
+                    self.driver.quit()
+                    logger.info("Driver closed")
+                except Exception as e:
+                    logger.warning(f"Error closing driver: {e}")
             self.driver = None
     
     def accept_consent(self, timeout=MobileDeScraperConfig.CONSENT_TIMEOUT) -> bool:
@@ -123,61 +116,71 @@ class MobileDeScraperUnified:
                 logger.info("Last page reached")
                 return False
             
+            snapshot = snapshot_results(self.driver)
             self.driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-            time.sleep(0.5)
+            wait_for_clickable(self.driver, btn)
             btn.click()
-            time.sleep(2)
-            return True
+            return wait_for_page_transition(self.driver, snapshot, timeout)
         except Exception as e:
             logger.debug(f"Pagination complete: {e}")
             return False
     
     def extract_car(self, article_element) -> Optional[Dict]:
-        """Extract single car from article HTML"""
+        """Extract single car from article HTML using the search card spec"""
         try:
-            car = {}
-            
-            title = article_element.find('h2', class_='dNpqi')
-            car['title'] = title.get_text(strip=True) if title else None
-            
-            price = article_element.find(attrs={'data-testid': 'vip-price-label'})
-            if not price:
-                price = article_element.find('div', class_='HBWcC')
-            car['price'] = price.get_text(strip=True) if price else None
-            
-            mileage = article_element.find('span', string=re.compile(r'km'))
-            car['mileage'] = mileage.get_text(strip=True) if mileage else None
-            
-            link = article_element.find('a', href=True)
-            car['url'] = link['href'] if link else None
-            
-            return car if car.get('url') else None
+            return card_extractor.extract(article_element)
         except Exception as e:
             logger.debug(f"Extract error: {e}")
             return None
     
-    def scrape_page_batch(self) -> List[Dict]:
-        """Scrape all cars from current page"""
+    def is_blocked(self) -> bool:
+        """Detect the anti-bot block page"""
+        title = self.driver.title or ""
+        return "Access denied" in title or "Zugriff verweigert" in title
+    
+    def page_delay(self) -> float:
+        """Delay between pages: adaptive when the throttle is enabled, else SCRAPER_DELAY"""
+        if self.config.ADAPTIVE_THROTTLE_ENABLED:
+            return get_controller().delay
+        return self.config.SCRAPER_DELAY
+    
+    def capture_page(self) -> Optional[str]:
+        """Fetch stage: source of the current result page, or None on the block page"""
+        if self.is_blocked():
+            logger.error("Access denied by mobile.de - backing off")
+            if self.config.ADAPTIVE_THROTTLE_ENABLED:
+                get_controller().record("block")
+            return None
+        if self.config.ADAPTIVE_THROTTLE_ENABLED:
+            get_controller().record("ok")
+        page_source = self.driver.page_source
+        self.pages_scraped += 1
+        collect_page_report(self.driver)
+        return page_source
+    
+    def scrape_page_batch(self, pipeline: Optional[CrawlPipeline] = None) -> List[Dict]:
+        """Scrape all cars from current page; storage goes through the pipeline when given"""
         try:
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            articles = soup.find_all('article')
-            cars = []
+            page_source = self.capture_page()
+            if page_source is None:
+                return []
+            archive_page(self.driver.current_url, page_source, via="driver")
+            cars = card_extractor.extract_page(page_source)
             
-            for article in articles:
-                car = self.extract_car(article)
-                if car:
-                    cars.append(car)
-                    if DB_ENABLED:
-                        try:
-                            save_car_to_database(car)
-                        except Exception as e:
-                            logger.warning(f"DB save error: {e}")
+            if pipeline is not None:
+                pipeline.store(cars)
+            elif DB_ENABLED:
+                get_db_writer().submit(cars)
             
             return cars
         except Exception as e:
             logger.error(f"Page scrape error: {e}")
             return []
     
+    def new_pipeline(self) -> CrawlPipeline:
+        """Pipeline whose store stage is the background DB writer when the database is available"""
+        return CrawlPipeline(writer=get_db_writer() if DB_ENABLED else None)
+    
     async def scrape_streaming(self, url: str, max_pages: Optional[int] = None) -> AsyncGenerator[Dict, None]:
         """
         Stream scrape with real-time progress yields
@@ -186,6 +189,8 @@ class MobileDeScraperUnified:
         max_pages = max_pages or self.config.MAX_PAGES
         page_num = 0
         total_cars = 0
+        # Cards are parsed inline for the progress events; only storage is pipelined
+        pipeline = self.new_pipeline().start()
         
         try:
             if not self.setup_driver():
@@ -195,12 +200,12 @@ class MobileDeScraperUnified:
             logger.info(f"Starting stream scrape: {url}")
             self.driver.get(url)
             self.driver.set_page_load_timeout(MobileDeScraperConfig.PAGE_LOAD_TIMEOUT)
-            time.sleep(2)
+            wait_for_document_ready(self.driver, MobileDeScraperConfig.PAGE_LOAD_TIMEOUT)
             self.accept_consent()
             
             while page_num < max_pages:
                 try:
-                    cars = self.scrape_page_batch()
+                    cars = self.scrape_page_batch(pipeline)
                     total_cars += len(cars)
                     
                     yield {
@@ -216,7 +221,7 @@ class MobileDeScraperUnified:
                         break
                     
                     page_num += 1
-                    time.sleep(self.config.SCRAPER_DELAY)
+                    time.sleep(self.page_delay())
                     
                 except Exception as e:
                     logger.error(f"Page {page_num + 1} error: {e}")
@@ -227,6 +232,9 @@ class MobileDeScraperUnified:
                 "status": "completed",
                 "total_pages": page_num + 1,
                 "total_cars": total_cars,
+                "pipeline": pipeline.close(),
+                "page_waits": wait_stats.get_stats(),
+                "resource_blocking": blocking_stats.get_stats(),
                 "timestamp": datetime.now().isoformat()
             }
             
@@ -235,15 +243,138 @@ class MobileDeScraperUnified:
             yield {"status": "error", "error": str(e)}
         finally:
             self.close_driver()
+            pipeline.close()
+    
+    def fetch_result_page(self, query: SearchQuery, page: int) -> Optional[str]:
+        """
+        Navigate straight to a result page by URL, retrying it on its own
+        Returns its source, "" when the page loads but lists no cars (past
+        the last page: the end of the results, not a failure) or None once
+        the retries are spent.
+        """
+        for attempt in range(1, self.config.SEARCH_PAGE_RETRIES + 2):
+            try:
+                self.driver.get(query.url(page))
+                wait_for_document_ready(self.driver, MobileDeScraperConfig.PAGE_LOAD_TIMEOUT)
+                if self.pages_scraped == 0:
+                    self.accept_consent()
+                page_source = self.capture_page()
+                if page_source is not None:
+                    if any(marker in page_source for marker in RESULT_PAGE_MARKERS):
+                        return page_source
+                    logger.info(f"Page {page}: no cars listed, end of results")
+                    return ""
+                logger.warning(f"Page {page} attempt {attempt}: blocked")
+            except Exception as e:
+                logger.warning(f"Page {page} attempt {attempt} error: {e}")
+            time.sleep(self.page_delay())
+        return None
+    
+    def fetch_pages(self, query: SearchQuery, pages: "queue.Queue[int]", pipeline: CrawlPipeline,
+                    failed_pages: List[int]) -> bool:
+        """Fetch stage worker: take page numbers until none are left; False if no driver was available"""
+        if self.driver is None and not self.setup_driver():
+            return False
+        try:
+            while True:
+                try:
+                    page = pages.get_nowait()
+                except queue.Empty:
+                    return True
+                page_source = self.fetch_result_page(query, page)
+                if page_source is None:
+                    failed_pages.append(page)
+                    continue
+                if not page_source:
+                    # End of results: the pages still queued all come after this one
+                    try:
+                        while True:
+                            pages.get_nowait()
+                    except queue.Empty:
+                        return True
+                pipeline.submit_page(query.url(page), page_source)
+                time.sleep(self.page_delay())
+        finally:
+            self.close_driver()
+    
+    def scrape_pages(self, query: SearchQuery, start_page: int = 1, max_pages: Optional[int] = None) -> Dict:
+        """
+        Batch scrape by URL pagination
+        Page start_page is fetched first to learn the page count, so pages
+        past the last one are never requested. Each page is addressed
+        directly, retried individually and skipped on failure, so a run can
+        resume from any page. PIPELINE_FETCH_WORKERS drivers fetch pages
+        while the pipeline parses and stores them.
+        """
+        max_pages = max_pages or self.config.MAX_PAGES
+        failed_pages: List[int] = []
+        
+        try:
+            logger.info(f"Starting URL batch scrape: {query} from page {start_page}")
+            with self.new_pipeline() as pipeline:
+                if not self.setup_driver():
+                    return {"status": "error", "error": "Driver init failed"}
+                first = self.fetch_result_page(query, start_page)
+                if first is None:
+                    self.close_driver()
+                    logger.error(f"Could not fetch result page {start_page} for {query}")
+                    return {"status": "error", "error": f"Result page {start_page} failed"}
+                
+                last_page = start_page
+                if first:
+                    pipeline.submit_page(query.url(start_page), first)
+                    # Without a page count label, fetch up to max_pages and stop at the first empty page
+                    total_pages = parse_total_pages(make_soup(first, parse_only=PAGINATION_STRAINER))
+                    last_page = start_page + max_pages - 1
+                    if total_pages:
+                        last_page = min(total_pages, last_page)
+                logger.info(f"URL pagination: pages {start_page}-{last_page}")
+                
+                pages: "queue.Queue[int]" = queue.Queue()
+                for page in range(start_page + 1, last_page + 1):
+                    pages.put(page)
+                if pages.empty():
+                    self.close_driver()
+                else:
+                    time.sleep(self.page_delay())
+                    fetchers = [self] + [MobileDeScraperUnified()
+                                         for _ in range(min(self.config.PIPELINE_FETCH_WORKERS, pages.qsize()) - 1)]
+                    threads = [threading.Thread(target=f.fetch_pages, args=(query, pages, pipeline, failed_pages),
+                                                name=f"pipeline-fetch-{i}", daemon=True)
+                               for i, f in enumerate(fetchers)]
+                    for thread in threads:
+                        thread.start()
+                    for thread in threads:
+                        thread.join()
+            
+            stats = pipeline.get_stats()
+            return {
+                "status": "completed",
+                "pages_scraped": stats["fetch"]["pages"],
+                "failed_pages": sorted(failed_pages),
+                "total_cars": len(pipeline.cars),
+                "cars": pipeline.cars,
+                "pipeline": stats,
+                "page_waits": wait_stats.get_stats(),
+                "resource_blocking": blocking_stats.get_stats(),
+                "timestamp": datetime.now().isoformat()
+            }
+        except Exception as e:
+            logger.error(f"Batch error: {e}")
+            return {"status": "error", "error": str(e)}
     
     def scrape_batch(self, url: str, max_pages: Optional[int] = None) -> Dict:
         """
         Batch scrape - returns all at once
         Use for background jobs
         """
+        query = SearchQuery.from_url(url) if self.config.URL_PAGINATION else None
+        if query is not None:
+            return self.scrape_pages(query, max_pages=max_pages)
+        
         max_pages = max_pages or self.config.MAX_PAGES
-        all_cars = []
         page_num = 0
+        pipeline = self.new_pipeline().start()
         
         try:
             if not self.setup_driver():
@@ -252,28 +383,34 @@ class MobileDeScraperUnified:
             logger.info(f"Starting batch scrape: {url}")
             self.driver.get(url)
             self.driver.set_page_load_timeout(MobileDeScraperConfig.PAGE_LOAD_TIMEOUT)
-            time.sleep(2)
+            wait_for_document_ready(self.driver, MobileDeScraperConfig.PAGE_LOAD_TIMEOUT)
             self.accept_consent()
             
             while page_num < max_pages:
                 try:
-                    cars = self.scrape_page_batch()
-                    all_cars.extend(cars)
+                    page_source = self.capture_page()
+                    if page_source is not None:
+                        pipeline.submit_page(self.driver.current_url, page_source)
                     page_num += 1
                     
                     if not self.next_page():
                         break
                     
-                    time.sleep(self.config.SCRAPER_DELAY)
+                    time.sleep(self.page_delay())
                 except Exception as e:
                     logger.error(f"Page {page_num + 1} error: {e}")
                     break
             
+            self.close_driver()
+            stats = pipeline.close()
             return {
                 "status": "completed",
                 "pages_scraped": page_num,
-                "total_cars": len(all_cars),
-                "cars": all_cars,
+                "total_cars": len(pipeline.cars),
+                "cars": pipeline.cars,
+                "pipeline": stats,
+                "page_waits": wait_stats.get_stats(),
+                "resource_blocking": blocking_stats.get_stats(),
                 "timestamp": datetime.now().isoformat()
             }
         except Exception as e:
@@ -281,11 +418,13 @@ class MobileDeScraperUnified:
             return {"status": "error", "error": str(e)}
         finally:
             self.close_driver()
+            pipeline.close()
 
 
 # Convenience functions for backward compatibility
-def scrape_batch(url: str = "https://www.mobile.de", max_pages: Optional[int] = None) -> Dict:
-    """Batch scraper entry point"""
+def scrape_batch(url: Optional[str] = None, max_pages: Optional[int] = None) -> Dict:
+    """Batch scraper entry point (defaults to SEARCH_URL, else the homepage)"""
+    url = url or Config.SEARCH_URL or "https://www.mobile.de"
     scraper = MobileDeScraperUnified()
     return scraper.scrape_batch(url, max_pages)
 
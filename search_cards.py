@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Declarative extraction spec for search-result cards
+Each field lists its selectors in fallback order plus the value to read and
+optional post-processing. The spec is compiled once into matchers that fill
+every field in a single walk of an <article>, and result pages are parsed
+with a SoupStrainer so only <article> subtrees are built. Selector updates
+are data changes: set SEARCH_CARD_SPEC_FILE to a JSON file with the same
+shape as DEFAULT_CARD_SPEC.
+"""
+
+import json
+import logging
+import re
+from typing import Callable, Dict, List, Optional
+
+from bs4 import SoupStrainer, Tag
+
+from config_manager import Config
+from html_parsing import make_soup
+
+logger = logging.getLogger(__name__)
+
+# Selector keys: tag, class (one class or the full class string), attrs
+# (exact values; true means "present"), text (regex searched in the tag's string).
+# value: "text" for the stripped text, "@name" for an attribute.
+DEFAULT_CARD_SPEC: List[Dict] = [
+    {"field": "title", "selectors": [{"tag": "h2", "class": "dNpqi"}], "value": "text"},
+    {"field": "price", "selectors": [{"attrs": {"data-testid": "vip-price-label"}},
+                                     {"tag": "div", "class": "HBWcC"}], "value": "text"},
+    {"field": "mileage", "selectors": [{"tag": "span", "text": "km"}], "value": "text"},
+    {"field": "url", "selectors": [{"tag": "a", "attrs": {"href": True}}], "value": "@href", "required": True},
+]
+
+POSTPROCESSORS: Dict[str, Callable[[str], str]] = {
+    "collapse_whitespace": lambda value: " ".join(value.split()),
+    "digits": lambda value: re.sub(r"\D", "", value),
+}
+
+ARTICLE_STRAINER = SoupStrainer("article")
+PAGINATION_STRAINER = SoupStrainer(attrs={"data-testid": "srp-pagination"})
+PAGE_RATIO_RE = re.compile(r"(\d+)\s*/\s*(\d+)")
+
+
+class _Selector:
+    """One compiled selector; matches with BeautifulSoup find() semantics"""
+
+    __slots__ = ("tag", "css_class", "attrs", "text")
+
+    def __init__(self, spec: Dict):
+        self.tag = spec.get("tag")
+        self.css_class = spec.get("class")
+        self.attrs = list((spec.get("attrs") or {}).items())
+        self.text = re.compile(spec["text"]) if spec.get("text") else None
+
+    def matches(self, tag: Tag) -> bool:
+        if self.tag is not None and tag.name != self.tag:
+            return False
+        if self.css_class is not None:
+            classes = tag.get("class") or []
+            if self.css_class not in classes and " ".join(classes) != self.css_class:
+                return False
+        for name, expected in self.attrs:
+            actual = tag.attrs.get(name)
+            if actual is None or (expected is not True and actual != expected):
+                return False
+        if self.text is not None:
+            string = tag.string
+            if string is None or not self.text.search(string):
+                return False
+        return True
+
+
+class _Field:
+    __slots__ = ("name", "selectors", "attribute", "post", "required")
+
+    def __init__(self, spec: Dict):
+        self.name = spec["field"]
+        self.selectors = [_Selector(s) for s in spec["selectors"]]
+        value = spec.get("value", "text")
+        self.attribute = value[1:] if value.startswith("@") else None
+        self.post = [POSTPROCESSORS[p] for p in spec.get("post", [])]
+        self.required = spec.get("required", False)
+
+    def read(self, tag: Optional[Tag]) -> Optional[str]:
+        if tag is None:
+            return None
+        value = tag.get(self.attribute) if self.attribute else tag.get_text(strip=True)
+        if value is None:
+            return None
+        for post in self.post:
+            value = post(value)
+        return value
+
+
+class CardExtractor:
+    """Compiled card spec: fills every field from one walk over an article"""
+
+    def __init__(self, spec: Optional[List[Dict]] = None):
+        self.fields = [_Field(f) for f in (spec or DEFAULT_CARD_SPEC)]
+
+    def extract(self, article: Tag) -> Optional[Dict]:
+        """Field values for one card, or None if a required field is missing"""
+        # best[i] = (selector rank, tag); a lower rank is an earlier fallback
+        best = [None] * len(self.fields)
+        unresolved = len(self.fields)
+        for tag in article.descendants:
+            if not isinstance(tag, Tag):
+                continue
+            for i, field in enumerate(self.fields):
+                current = best[i]
+                limit = len(field.selectors) if current is None else current[0]
+                for rank in range(limit):
+                    if field.selectors[rank].matches(tag):
+                        best[i] = (rank, tag)
+                        if rank == 0:
+                            unresolved -= 1
+                        break
+            if not unresolved:
+                break
+
+        car = {}
+        for field, found in zip(self.fields, best):
+            car[field.name] = field.read(found[1] if found else None)
+            if field.required and not car[field.name]:
+                return None
+        return car
+
+    def extract_page(self, html: str) -> List[Dict]:
+        """Parse only the <article> subtrees of a result page and extract every card"""
+        soup = make_soup(html, parse_only=ARTICLE_STRAINER)
+        cars = []
+        for article in soup.find_all("article"):
+            try:
+                car = self.extract(article)
+            except Exception as e:
+                logger.debug(f"Card extract error: {e}")
+                continue
+            if car:
+                cars.append(car)
+        return cars
+
+
+def load_card_spec(path: Optional[str] = None) -> List[Dict]:
+    """Card spec from SEARCH_CARD_SPEC_FILE, or the built-in default"""
+    path = path if path is not None else Config.SEARCH_CARD_SPEC_FILE
+    if not path:
+        return DEFAULT_CARD_SPEC
+    try:
+        with open(path, encoding="utf-8") as f:
+            spec = json.load(f)
+        CardExtractor(spec)  # validate before use
+        logger.info(f"Loaded search card spec from {path}")
+        return spec
+    except Exception as e:
+        logger.error(f"Invalid search card spec {path}, using default: {e}")
+        return DEFAULT_CARD_SPEC
+
+
+card_extractor = CardExtractor(load_card_spec())
+
+
+def parse_result_page(html: str) -> List[Dict]:
+    """Cards of one result page with the process-wide extractor (picklable for process pools)"""
+    return card_extractor.extract_page(html)
+
+
+def parse_total_pages(soup) -> Optional[int]:
+    """Total page count from the pagination label ("1 / 42") of a result page"""
+    ratio_el = soup.select_one('[data-testid="srp-pagination"] span.XUy1p')
+    if ratio_el:
+        m = PAGE_RATIO_RE.search(ratio_el.get_text(strip=True))
+        if m:
+            return int(m.group(2))
+    return None
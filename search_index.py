@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Full-text car search
+Each car carries a search document (title, model range, trim line, dealer
+and feature names) written on upsert and indexed per backend: a GIN
+tsvector index plus a pg_trgm index on Postgres, an FTS5 table on SQLite
+(see database.py). Queries match every term as a prefix, ranked by
+relevance; on Postgres a query with no full-text hit falls back to
+trigram word similarity, so misspellings still find cars.
+
+Usage:
+  python search_index.py rebuild [--batch-size N] [--all]   # (re)build search documents of stored cars
+"""
+
+import argparse
+import logging
+import re
+import sys
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Float, Integer, func, literal, literal_column, select, text, update
+
+from database import db_manager, Car, CarFeature, Feature
+
+logger = logging.getLogger(__name__)
+
+TERM_RE = re.compile(r"\w+", re.UNICODE)
+MAX_TERMS = 8
+
+DOCUMENT_FIELDS = ("url_title", "model_range", "trim_line", "dealer")
+
+# Must match the expression of ix_cars_search_tsv for the index to be used
+_TSVECTOR = func.to_tsvector(literal_column("'simple'"), func.coalesce(Car.search_document, literal_column("''")))
+
+
+def build_search_document(car_dict: Dict, features_data=None) -> Optional[str]:
+    """Searchable text of a car record keyed by the Car columns"""
+    parts = [car_dict.get(field) for field in DOCUMENT_FIELDS]
+    if isinstance(features_data, dict):
+        parts.extend(name for names in features_data.values() if names for name in names)
+    elif isinstance(features_data, list):
+        parts.extend(features_data)
+    document = " ".join(p.strip() for p in parts if isinstance(p, str) and p.strip())
+    return document or None
+
+
+def query_terms(q: str) -> List[str]:
+    return TERM_RE.findall(q.lower())[:MAX_TERMS]
+
+
+def _postgres_queries(terms: List[str], q: str, limit: int, fuzzy: bool):
+    tsquery = func.to_tsquery(literal_column("'simple'"), " & ".join(f"{term}:*" for term in terms))
+    rank = func.ts_rank(_TSVECTOR, tsquery)
+    yield (select(Car, rank.label("rank")).where(_TSVECTOR.op("@@")(tsquery))
+           .order_by(rank.desc(), Car.id).limit(limit))
+    if fuzzy:
+        similarity = func.word_similarity(q, Car.search_document)
+        yield (select(Car, similarity.label("rank")).where(literal(q).op("<%")(Car.search_document))
+               .order_by(similarity.desc(), Car.id).limit(limit))
+
+
+def _sqlite_queries(terms: List[str], limit: int):
+    # All terms as prefixes first, then any of them
+    for operator in (" AND ", " OR "):
+        match = operator.join(f'"{term}"*' for term in terms)
+        hits = (text("SELECT rowid AS car_id, -bm25(cars_fts) AS rank FROM cars_fts "
+                     "WHERE cars_fts MATCH :match ORDER BY rank DESC LIMIT :limit")
+                .bindparams(match=match, limit=limit)
+                .columns(car_id=Integer, rank=Float)
+                .subquery())
+        yield select(Car, hits.c.rank).join(hits, Car.id == hits.c.car_id).order_by(hits.c.rank.desc(), Car.id)
+        if len(terms) == 1:
+            return
+
+
+def _fallback_queries(terms: List[str], limit: int):
+    condition = [Car.search_document.ilike(f"%{term}%") for term in terms]
+    yield select(Car, literal(0.0).label("rank")).where(*condition).order_by(Car.id).limit(limit)
+
+
+async def search_cars(session, q: str, limit: int, trigram_enabled: bool = False) -> List[Tuple[Car, float]]:
+    """(car, rank) pairs for a query, best first; tries stricter queries before looser ones"""
+    terms = query_terms(q)
+    if not terms:
+        return []
+    dialect = session.bind.dialect.name
+    if dialect == "postgresql":
+        queries = _postgres_queries(terms, q, limit, trigram_enabled)
+    elif dialect == "sqlite":
+        queries = _sqlite_queries(terms, limit)
+    else:
+        queries = _fallback_queries(terms, limit)
+    for query in queries:
+        rows = (await session.execute(query)).all()
+        if rows:
+            return [(row[0], float(row[1] or 0.0)) for row in rows]
+    return []
+
+
+def rebuild_search_documents(batch_size: int = 1000, only_missing: bool = True) -> Dict:
+    """Write the search document of stored cars (the index follows via triggers / expression index)"""
+    counts = {"scanned": 0, "updated": 0}
+    columns = [Car.id, Car.updated_at, *(getattr(Car, field) for field in DOCUMENT_FIELDS)]
+    last_id = 0
+    try:
+        while True:
+            with db_manager.get_session() as session:
+                query = select(*columns).where(Car.id > last_id)
+                if only_missing:
+                    query = query.where(Car.search_document.is_(None))
+                rows = session.execute(query.order_by(Car.id).limit(batch_size)).all()
+                if not rows:
+                    break
+                last_id = rows[-1].id
+                features: Dict[int, List[str]] = {}
+                feature_rows = session.execute(
+                    select(CarFeature.car_id, Feature.name)
+                    .join(Feature, Feature.id == CarFeature.feature_id)
+                    .where(CarFeature.car_id.in_([row.id for row in rows]))
+                ).all()
+                for car_id, name in feature_rows:
+                    features.setdefault(car_id, []).append(name)
+                params = []
+                for row in rows:
+                    document = build_search_document(row._asdict(), sorted(features.get(row.id, [])))
+                    if document:
+                        params.append({"id": row.id, "updated_at": row.updated_at, "search_document": document})
+                if params:
+                    session.execute(update(Car), params)
+                counts["scanned"] += len(rows)
+                counts["updated"] += len(params)
+            logger.info(f"Search documents written up to car id {last_id}: {counts}")
+    except Exception as e:
+        logger.error(f"Error rebuilding search documents: {e}")
+        counts["error"] = str(e)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Search index maintenance")
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--batch-size", type=int, default=1000, help="rows per UPDATE batch")
+    parser.add_argument("--all", action="store_true", help="rewrite every document, not only missing ones")
+    args = parser.parse_args(argv)
+
+    result = rebuild_search_documents(batch_size=args.batch_size, only_missing=not args.all)
+    logger.info(f"Rebuild finished: {result}")
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    main(sys.argv[1:])
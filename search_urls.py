@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+URL builder for mobile.de search result pages
+Turns the search state (make, model, mileage, page) into a URL so any
+result page can be fetched directly instead of clicking through. Searches
+are for purchase offers, the site default; other site filters can be passed
+as extra_params
+"""
+
+import logging
+from typing import Dict, Optional
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+logger = logging.getLogger(__name__)
+
+SEARCH_BASE_URL = "https://suchen.mobile.de/fahrzeuge/search.html"
+LISTING_BASE_URL = "https://suchen.mobile.de/fahrzeuge/details.html"
+
+class SearchQuery:
+    """Search state that maps one-to-one onto a result page URL"""
+
+    def __init__(self, make_id: Optional[int] = None, model_id: Optional[int] = None,
+                 mileage_max: Optional[int] = None, lang: str = "en",
+                 extra_params: Optional[Dict[str, str]] = None):
+        self.make_id = make_id
+        self.model_id = model_id
+        self.mileage_max = mileage_max
+        self.lang = lang
+        self.extra_params = dict(extra_params or {})
+
+    def params(self, page: int = 1) -> Dict[str, str]:
+        """Query parameters for a given 1-based result page"""
+        params = {
+            "isSearchRequest": "true",
+            "dam": "false",
+            "s": "Car",
+            "vc": "Car",
+        }
+        if self.make_id is not None:
+            # ms = make;model;; (model and the trailing fields may be empty)
+            model = "" if self.model_id is None else str(self.model_id)
+            params["ms"] = f"{self.make_id};{model};;"
+        if self.mileage_max is not None:
+            params["ml"] = f":{self.mileage_max}"
+        params.update(self.extra_params)
+        if self.lang:
+            params["lang"] = self.lang
+        if page > 1:
+            params["pageNumber"] = str(page)
+        return params
+
+    def url(self, page: int = 1) -> str:
+        """Result page URL for a given 1-based page number"""
+        return f"{SEARCH_BASE_URL}?{urlencode(self.params(page))}"
+
+    @classmethod
+    def from_url(cls, url: str) -> Optional["SearchQuery"]:
+        """Rebuild a query from a search result URL; None if it is not one"""
+        parts = urlsplit(url)
+        if not parts.path.endswith("search.html"):
+            return None
+        qs = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        make_id = model_id = mileage_max = None
+        if qs.get("ms"):
+            make, _, rest = qs.pop("ms").partition(";")
+            model = rest.split(";", 1)[0]
+            make_id = int(make) if make.isdigit() else None
+            model_id = int(model) if model.isdigit() else None
+        if qs.get("ml"):
+            upper = qs.pop("ml").rpartition(":")[2]
+            mileage_max = int(upper) if upper.isdigit() else None
+        for key in ("isSearchRequest", "dam", "s", "vc", "pageNumber"):
+            qs.pop(key, None)
+        lang = qs.pop("lang", "")
+        return cls(make_id=make_id, model_id=model_id, mileage_max=mileage_max,
+                   lang=lang, extra_params=qs)
+
+    def __repr__(self):
+        return (f"SearchQuery(make_id={self.make_id}, model_id={self.model_id}, "
+                f"mileage_max={self.mileage_max})")
+
+
+# The search scraper.py used to submit through the quick-search form
+DEFAULT_SEARCH = SearchQuery(make_id=17200, model_id=126, mileage_max=50000)
+
+
+def listing_url(listing_id) -> str:
+    """Detail page URL for a listing id"""
+    return f"{LISTING_BASE_URL}?{urlencode({'id': listing_id})}"
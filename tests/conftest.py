@@ -0,0 +1,22 @@
+import os
+
+import pytest
+
+# The database modules connect at import: point them at a shared in-memory
+# SQLite database before any test imports them
+os.environ["DB_URL"] = "sqlite:///file:scraper_tests?mode=memory&cache=shared&uri=true"
+os.environ.setdefault("API_TOKEN", "test-token")
+
+
+@pytest.fixture
+def empty_db():
+    """The test database with every car, feature and cached feature id removed"""
+    from database import Car, CarFeature, Feature, FeatureSection, db_manager
+    from db_operations import feature_ids, section_ids
+
+    with db_manager.get_session() as session:
+        for model in (CarFeature, Car, Feature, FeatureSection):
+            session.query(model).delete()
+    for cache in (feature_ids, section_ids):
+        cache._ids.clear()
+    return db_manager
@@ -0,0 +1,58 @@
+from database import Car, CarFeature, Feature
+from db_operations import save_cars_to_database
+
+URL = "https://suchen.mobile.de/fahrzeuge/details.html?id={}"
+
+
+def car(listing_id, price="23.990 €", features=None):
+    record = {"url": URL.format(listing_id), "title": f"Car {listing_id}", "price": price,
+              "mileage": "45.000 km", "detail_page": True}
+    if features is not None:
+        record["features"] = features
+    return record
+
+
+def stored(db):
+    with db.get_session() as session:
+        return {c.listing_id: (c.price, c.price_eur, c.updated_at) for c in session.query(Car)}
+
+
+def feature_names(db, listing_id):
+    with db.get_session() as session:
+        rows = (session.query(Feature.name).join(CarFeature, CarFeature.feature_id == Feature.id)
+                .join(Car, Car.id == CarFeature.car_id).filter(Car.listing_id == listing_id))
+        return {name for name, in rows}
+
+
+def test_bulk_upsert_counts(empty_db):
+    assert save_cars_to_database([car(1), car(2)]) == {"inserted": 2, "updated": 0, "unchanged": 0, "failed": 0}
+    first = stored(empty_db)
+
+    assert save_cars_to_database([car(1), car(2)]) == {"inserted": 0, "updated": 0, "unchanged": 2, "failed": 0}
+    assert stored(empty_db) == first  # unchanged rows keep updated_at
+
+    counts = save_cars_to_database([car(1), car(2, price="21.500 €"), car(3)])
+    assert counts == {"inserted": 1, "updated": 1, "unchanged": 1, "failed": 0}
+    rows = stored(empty_db)
+    assert rows["1"] == first["1"]
+    assert rows["2"][:2] == ("21.500 €", 21500)
+    assert rows["2"][2] >= first["2"][2]
+    assert set(rows) == {"1", "2", "3"}
+
+
+def test_repeated_url_in_batch_keeps_last_copy(empty_db):
+    counts = save_cars_to_database([car(1, price="1 €"), car(1, price="2 €")])
+    assert counts == {"inserted": 1, "updated": 0, "unchanged": 0, "failed": 0}
+    assert stored(empty_db)["1"][0] == "2 €"
+
+
+def test_bulk_upsert_replaces_features(empty_db):
+    save_cars_to_database([car(1, features={"Comfort": ["Heated seats", "Navigation"]}),
+                           car(2, features=["Navigation"])])
+    assert feature_names(empty_db, "1") == {"Heated seats", "Navigation"}
+
+    counts = save_cars_to_database([car(1, features={"Comfort": ["Navigation", "Parking sensors"]}),
+                                    car(2, features=["Navigation"])])
+    assert counts == {"inserted": 0, "updated": 1, "unchanged": 1, "failed": 0}
+    assert feature_names(empty_db, "1") == {"Navigation", "Parking sensors"}
+    assert feature_names(empty_db, "2") == {"Navigation"}
@@ -0,0 +1,64 @@
+import os
+import re
+
+import pytest
+
+import scraper
+from config_manager import Config
+from embedded_data import EMBEDDED_FIELDS, LISTING_FIELDS, covers_listing, extract_embedded_fields
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+LINK = "https://suchen.mobile.de/fahrzeuge/details.html?id=398765432"
+STATE_RE = re.compile(r"<script>window\.__INITIAL_STATE__.*?</script>", re.DOTALL)
+
+
+@pytest.fixture
+def page():
+    with open(os.path.join(FIXTURES, "listing_embedded_de.html"), encoding="utf-8") as f:
+        return f.read()
+
+
+def parse(html, monkeypatch, embedded):
+    monkeypatch.setattr(Config, "EMBEDDED_DATA_ENABLED", embedded)
+    record = scraper.parse_listing_html(html, LINK)
+    record["img_urls"] = sorted(record["img_urls"])
+    return record
+
+
+def test_embedded_fields_of_recorded_page(page):
+    fields = extract_embedded_fields(page, "398765432")
+    assert set(EMBEDDED_FIELDS) <= set(fields)
+    assert fields["price"] == "23.990 €"
+    assert fields["power"] == "110 kW (150 PS)"
+    assert fields["first_registration"] == "03/2021"
+    # Phone, ratings and the like only exist in the DOM
+    assert not covers_listing(fields)
+
+
+def test_embedded_path_matches_dom_path(page, monkeypatch):
+    before = scraper.embedded_stats["dom_fallback"]
+    embedded = parse(page, monkeypatch, embedded=True)
+    assert scraper.embedded_stats["dom_fallback"] == before + 1
+    assert embedded == parse(page, monkeypatch, embedded=False)
+    assert embedded["phone"] == "+49 30 1234567"
+
+
+def test_dom_fallback_keeps_dom_values(page, monkeypatch):
+    # JSON-LD alone lacks seller type and features, so the DOM walk runs
+    partial = STATE_RE.sub("", page).replace('"price": 23990', '"price": 19990')
+    before = scraper.embedded_stats["dom_fallback"]
+    merged = parse(partial, monkeypatch, embedded=True)
+    assert scraper.embedded_stats["dom_fallback"] == before + 1
+    assert merged["price"] == "23.990 €"
+    assert merged == parse(partial, monkeypatch, embedded=False)
+
+
+def test_complete_embedded_data_skips_dom(monkeypatch):
+    complete = {name: [f"{name}-value"] if name in ("features", "img_urls") else f"{name}-value"
+                for name in LISTING_FIELDS}
+    monkeypatch.setattr(scraper, "extract_embedded_fields", lambda html, listing_id: dict(complete))
+    monkeypatch.setattr(scraper, "make_soup", None)  # the DOM must not be parsed
+    before = scraper.embedded_stats["embedded_only"]
+    record = parse("<html></html>", monkeypatch, embedded=True)
+    assert scraper.embedded_stats["embedded_only"] == before + 1
+    assert record == {"url": LINK, **complete, "detail_page": True}
@@ -0,0 +1,63 @@
+from datetime import date
+
+import pytest
+
+from normalize import normalize_car_fields, parse_int, parse_power, parse_registration
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("23.990 €", 23990),
+    ("€23,990", 23990),
+    ("23 990 €", 23990),
+    ("23\u202f990 €", 23990),
+    ("1.234.567 €", 1234567),
+    ("45,000 km", 45000),
+    ("5 km", 5),
+    ("19.990,50 €", 19991),
+    ("19,990.49", 19990),
+    ("1.498 cm³", 1498),
+    ("139 g/km (comb.)", 139),
+    ("Price on request", None),
+    ("", None),
+    (None, None),
+])
+def test_parse_int(text, expected):
+    assert parse_int(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("140 kW (190 PS)", (140, 190)),
+    ("110 kW (150 hp)", (110, 150)),
+    ("1.050 kW (1.428 PS)", (1050, 1428)),
+    ("150 PS", (110, 150)),
+    ("110 kW", (110, 150)),
+    ("n/a", (None, None)),
+    (None, (None, None)),
+])
+def test_parse_power(text, expected):
+    assert parse_power(text) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("03/2021", date(2021, 3, 1)),
+    ("3/2021", date(2021, 3, 1)),
+    ("03.2021", date(2021, 3, 1)),
+    ("2021-03", date(2021, 3, 1)),
+    ("2021-03-17", date(2021, 3, 1)),
+    ("2021", date(2021, 1, 1)),
+    ("13/2021", None),
+    ("New", None),
+    (None, None),
+])
+def test_parse_registration(text, expected):
+    assert parse_registration(text) == expected
+
+
+def test_normalize_car_fields():
+    car = {"price": "23.990 €", "mileage": "45.000 km", "power": "110 kW (150 PS)",
+           "first_registration": "03/2021", "cubic_capacity": "1.498 cm³", "co2_emissions": "139 g/km"}
+    assert normalize_car_fields(car) == {
+        "price_eur": 23990, "mileage_km": 45000, "power_kw": 110, "power_hp": 150,
+        "first_registration_date": date(2021, 3, 1), "cubic_capacity_ccm": 1498, "co2_g_km": 139,
+    }
+    assert set(normalize_car_fields({}).values()) == {None}
@@ -0,0 +1,60 @@
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+
+from database import Car
+from pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page, split_page
+
+# Three creation times shared by several cars each, so every page boundary can fall inside a tie
+TIMES = [datetime(2024, 5, 1, 12, 0), datetime(2024, 5, 2, 8, 30), datetime(2024, 5, 3, 18, 15)]
+
+
+@pytest.fixture
+def tied_cars(empty_db):
+    with empty_db.get_session() as session:
+        for i in range(8):
+            session.add(Car(url=f"https://example.test/{i}", listing_id=str(i), created_at=TIMES[i % 3]))
+    with empty_db.get_session() as session:
+        return [(car.created_at, car.id) for car in session.query(Car)]
+
+
+def walk(db, sort, limit):
+    """Ids of every page in order, following next cursors until the last page"""
+    ids, cursor, pages = [], None, 0
+    while True:
+        with db.get_session() as session:
+            rows = session.scalars(keyset_page(select(Car), sort, limit, cursor)).all()
+            page, cursor = split_page(rows, sort, limit)
+            ids.extend(car.id for car in page)
+        pages += 1
+        if cursor is None:
+            return ids, pages
+
+
+@pytest.mark.parametrize("sort", ["created_at", "-created_at", "id", "-id"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 8, 50])
+def test_cursor_walk_visits_every_row_once_in_order(empty_db, tied_cars, sort, limit):
+    name = sort.lstrip("-")
+    keys = sorted(tied_cars, key=(lambda k: k) if name == "created_at" else (lambda k: k[1]),
+                  reverse=sort.startswith("-"))
+    ids, pages = walk(empty_db, sort, limit)
+    assert ids == [car_id for _, car_id in keys]
+    assert pages == max(1, -(-len(keys) // limit))
+
+
+def test_cursor_round_trip():
+    car = Car(id=42, created_at=TIMES[1])
+    token = encode_cursor("-created_at", car)
+    assert decode_cursor(token, "-created_at") == [TIMES[1], 42]
+    assert decode_cursor(encode_cursor("id", car), "id") == [42, 42]
+
+
+@pytest.mark.parametrize("token, sort", [
+    (encode_cursor("created_at", Car(id=1, created_at=TIMES[0])), "-created_at"),
+    ("not-a-cursor", "id"),
+    ("", "created_at"),
+])
+def test_invalid_cursor(token, sort):
+    with pytest.raises(InvalidCursor):
+        decode_cursor(token, sort)
@@ -45,6 +45,10 @@ def main():
     """Main worker - runs scraper on schedule"""
     logger.info(f"Worker started - scheduling scraper every {Config.WORKER_INTERVAL_HOURS} hours")
     
+    if Config.DRIVER_POOL_ENABLED:
+        from driver_pool import get_driver_pool
+        get_driver_pool().warm()
+    
     # Schedule the job
     schedule.every(Config.WORKER_INTERVAL_HOURS).hours.do(scraper_job)
     
@@ -61,6 +65,13 @@ def main():
         except Exception as e:
             logger.error(f"Worker error: {e}")
             time.sleep(60)
+    
+    if Config.DRIVER_POOL_ENABLED:
+        from driver_pool import get_driver_pool
+        get_driver_pool().close_all()
+    
+    from db_writer import close_db_writer
+    close_db_writer()
 
 if __name__ == "__main__":
     main()